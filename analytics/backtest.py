@@ -0,0 +1,330 @@
+# analytics/backtest.py
+#
+# Vectorized backtests of simple signal strategies on stored NSE history.
+# Run a parameter sweep from the project root:
+#
+#     python -m analytics.backtest --strategy ma_cross --workers 8 --out ma_sweep.csv
+
+import argparse
+import itertools
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from analytics.indicators import TRADING_DAYS, load_panel, rsi, sma
+from core.instrumentation import timed
+
+# Every strategy turns (bars x symbols) arrays into a 0/1 long-or-flat position per bar,
+# decided at the close and held over the next bar. The portfolio is equal-weighted
+# across the symbols trading that day; costs are charged on every position change.
+
+DEFAULT_COST_BPS = 10.0
+# Sentiment published after the NSE close (15:30 IST) can only be traded the next session
+SESSION_CLOSE_OFFSET = pd.Timedelta(hours=8, minutes=30)
+# Hourly sentiment buckets are labelled by their start; an article can land anywhere inside
+SENTIMENT_BUCKET = pd.Timedelta(hours=1)
+MARKET_TZ = "Asia/Kolkata"
+# Indicator arrays kept per worker; sweeps are chunked so neighbouring combinations share windows
+INDICATOR_CACHE_SIZE = 16
+
+DEFAULT_GRIDS = {
+    "ma_cross": {"fast": list(range(5, 55, 5)), "slow": list(range(20, 210, 10))},
+    "rsi": {"period": [7, 14, 21], "lower": [20, 25, 30, 35], "upper": [55, 60, 65, 70, 75]},
+    "sentiment": {"threshold": [0.05, 0.1, 0.2, 0.3], "hold": [1, 3, 5, 10], "min_articles": [1, 2, 3]},
+}
+
+
+# ------------------- Inputs ------------------- #
+def daily_sentiment(index, symbols, hourly=None):
+    """
+    Per-session sentiment aligned to a bar index.
+
+    Hourly aggregates from analyze_sentiment are assigned to the first session that
+    could act on them (after-close and weekend news roll forward), then combined into
+    an article-weighted mean score. A bucket counts as published at its end, so the
+    15:00 bucket's after-close articles never reach that day's close.
+
+    Returns:
+        tuple: (score, articles) float64 arrays shaped (len(index), len(symbols)).
+    """
+    if hourly is None:
+        from ingestion.sentiment import load_hourly
+        hourly = load_hourly()
+    shape = (len(index), len(symbols))
+    score, articles = np.full(shape, np.nan), np.zeros(shape)
+    if hourly.empty or not len(index):
+        return score, articles
+
+    hours = pd.to_datetime(hourly["hour"], utc=True).dt.tz_convert(MARKET_TZ)
+    sessions = (hours + SENTIMENT_BUCKET + SESSION_CLOSE_OFFSET).dt.tz_localize(None).dt.normalize()
+    row = index.searchsorted(sessions.to_numpy())
+    col = pd.Index(symbols).get_indexer(hourly["symbol"])
+    keep = (row < len(index)) & (col >= 0)
+    if not keep.any():
+        return score, articles
+
+    n = hourly["articles"].to_numpy(dtype="float64")[keep]
+    weighted = np.zeros(shape)
+    np.add.at(articles, (row[keep], col[keep]), n)
+    np.add.at(weighted, (row[keep], col[keep]), n * hourly["mean_score"].to_numpy(dtype="float64")[keep])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(articles > 0, weighted / articles, np.nan)
+    return score, articles
+
+
+def load_inputs(symbols, with_sentiment=False):
+    """
+    Aligned inputs for a sweep: forward-filled closes plus, optionally, daily sentiment.
+
+    Returns:
+        tuple: (DatetimeIndex, list of symbols, dict name -> (bars x symbols) float64 array)
+    """
+    close = load_panel(symbols, fields=("Close",))["Close"].sort_index().ffill()
+    arrays = {"close": close.to_numpy(dtype="float64")}
+    if with_sentiment:
+        arrays["score"], arrays["articles"] = daily_sentiment(close.index, list(close.columns))
+    return close.index, list(close.columns), arrays
+
+
+# ------------------- Strategies ------------------- #
+class _Context:
+    """
+    The input arrays for one sweep plus indicators already computed from them, so the
+    combinations handled by one worker share e.g. each moving-average window.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.cache = OrderedDict()
+        self.asset_returns = asset_returns(arrays["close"])
+
+    def indicator(self, key, fn):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        else:
+            self.cache[key] = fn()
+            if len(self.cache) > INDICATOR_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return self.cache[key]
+
+
+def ma_cross_positions(ctx, fast, slow):
+    close = ctx.arrays["close"]
+    fast_ma = ctx.indicator(("sma", fast), lambda: sma(close, fast).to_numpy())
+    slow_ma = ctx.indicator(("sma", slow), lambda: sma(close, slow).to_numpy())
+    return (fast_ma > slow_ma).astype("float64")
+
+
+def rsi_positions(ctx, period, lower, upper):
+    """
+    Enter when RSI drops below 'lower', exit once it rises above 'upper'.
+    """
+    close = ctx.arrays["close"]
+    value = ctx.indicator(("rsi", period), lambda: rsi(close, period).to_numpy())
+    signal = np.select([value < lower, value > upper], [1.0, 0.0], default=np.nan)
+    # Hold the last entry/exit decision until the next one
+    return pd.DataFrame(signal).ffill().fillna(0.0).to_numpy()
+
+
+def sentiment_positions(ctx, threshold, hold, min_articles):
+    """
+    Enter on a session whose news score reaches 'threshold' (from at least 'min_articles'
+    headlines) and stay in for 'hold' bars after the latest trigger.
+    """
+    score, articles = ctx.arrays["score"], ctx.arrays["articles"]
+    trigger = ((score >= threshold) & (articles >= min_articles)).astype("float64")
+    return pd.DataFrame(trigger).rolling(hold, min_periods=1).max().to_numpy()
+
+
+STRATEGIES = {
+    "ma_cross": ma_cross_positions,
+    "rsi": rsi_positions,
+    "sentiment": sentiment_positions,
+}
+
+
+def expand_grid(strategy, grid=None):
+    """
+    Every parameter combination of 'grid' (name -> values), dropping meaningless ones.
+    """
+    grid = grid or DEFAULT_GRIDS[strategy]
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    if strategy == "ma_cross":
+        combos = [p for p in combos if p["fast"] < p["slow"]]
+    elif strategy == "rsi":
+        combos = [p for p in combos if p["lower"] < p["upper"]]
+    return combos
+
+
+# ------------------- Evaluation ------------------- #
+def asset_returns(close):
+    """
+    Bar-to-bar simple returns, 0 where either close is missing.
+    """
+    returns = np.zeros_like(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = close[1:] / close[:-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def evaluate(close, positions, cost_bps=DEFAULT_COST_BPS, returns=None):
+    """
+    Equal-weighted long/flat portfolio from per-symbol positions.
+
+    Returns:
+        tuple: (metrics dict, daily portfolio returns array). Metrics are total P&L
+        (fractional), annualized Sharpe, max drawdown, annualized turnover (multiples
+        of capital traded per year), average exposure and the number of trades.
+    """
+    listed = ~np.isnan(close)
+    positions = np.where(listed, np.nan_to_num(positions), 0.0)
+
+    asset = asset_returns(close) if returns is None else returns
+
+    held = np.zeros_like(positions)
+    held[1:] = positions[:-1]
+    trades = np.abs(np.diff(positions, axis=0, prepend=0.0))
+
+    width = np.maximum(listed.sum(axis=1), 1)
+    daily = ((held * asset).sum(axis=1) - cost_bps / 1e4 * trades.sum(axis=1)) / width
+
+    equity = np.cumprod(1 + daily)
+    std = daily.std(ddof=1) if len(daily) > 1 else 0.0
+    metrics = {
+        "pnl": float(equity[-1] - 1) if len(equity) else 0.0,
+        "sharpe": float(daily.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else np.nan,
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()) if len(equity) else 0.0,
+        "turnover": float((trades.sum(axis=1) / width).mean() * TRADING_DAYS),
+        "exposure": float(held.sum(axis=1).mean() / width.mean()) if len(held) else 0.0,
+        "trades": int(np.count_nonzero(trades)),
+    }
+    return metrics, daily
+
+
+def _run_combos(ctx, strategy, combos, cost_bps):
+    close = ctx.arrays["close"]
+    fn = STRATEGIES[strategy]
+    return [{**params, **evaluate(close, fn(ctx, **params), cost_bps, ctx.asset_returns)[0]} for params in combos]
+
+
+# ------------------- Parallel Sweeps ------------------- #
+# Set in each pool worker by _attach: views onto the parent's shared-memory arrays
+_worker_ctx = None
+_worker_shm = []
+
+
+def _attach(specs):
+    global _worker_ctx
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        # Keep the handle alive for as long as the view is in use
+        _worker_shm.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_ctx = _Context(arrays)
+
+
+def _run_chunk(strategy, combos, cost_bps):
+    return _run_combos(_worker_ctx, strategy, combos, cost_bps)
+
+
+def _chunks(strategy, combos, n_chunks):
+    # Keep combinations that share an indicator window together so worker caches hit
+    key = "slow" if strategy == "ma_cross" else next(iter(combos[0]))
+    order = sorted(combos, key=lambda p: p[key])
+    size = max(1, -(-len(order) // n_chunks))
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+
+@timed
+def sweep(strategy, symbols, grid=None, workers=None, cost_bps=DEFAULT_COST_BPS, inputs=None):
+    """
+    Backtest every parameter combination of 'strategy' over 'symbols'.
+
+    The aligned input arrays are placed in shared memory once and mapped by every
+    worker, so combinations are shipped to the pool as small parameter chunks.
+
+    Args:
+        grid (dict): name -> candidate values; defaults to DEFAULT_GRIDS[strategy].
+        workers (int): process count; 1 runs in this process.
+        inputs (tuple): precomputed load_inputs() result, e.g. to reuse across sweeps.
+
+    Returns:
+        pd.DataFrame: one row per combination with its parameters and metrics, best Sharpe first.
+    """
+    combos = expand_grid(strategy, grid)
+    _, columns, arrays = inputs or load_inputs(symbols, with_sentiment=strategy == "sentiment")
+    if not combos or not columns:
+        return pd.DataFrame(columns=[*(grid or DEFAULT_GRIDS[strategy]), "pnl", "sharpe", "max_drawdown",
+                                     "turnover", "exposure", "trades"])
+
+    workers = min(workers or os.cpu_count() or 1, len(combos))
+    if workers <= 1:
+        rows = _run_combos(_Context(arrays), strategy, combos, cost_bps)
+    else:
+        segments, specs = [], {}
+        try:
+            for name, array in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                segments.append(shm)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                specs[name] = (shm.name, array.shape, array.dtype.str)
+
+            # Several chunks per worker so a slow chunk doesn't leave the others idle
+            chunks = _chunks(strategy, combos, workers * 4)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+                parts = pool.map(_run_chunk, [strategy] * len(chunks), chunks, [cost_bps] * len(chunks))
+                rows = [row for part in parts for row in part]
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    return pd.DataFrame(rows).sort_values("sharpe", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def backtest(strategy, symbols, cost_bps=DEFAULT_COST_BPS, **params):
+    """
+    One parameter set, with the daily detail a sweep leaves out.
+
+    Returns:
+        dict: metrics plus "returns" and "equity" Series and "positions" DataFrame.
+    """
+    index, columns, arrays = load_inputs(symbols, with_sentiment=strategy == "sentiment")
+    positions = STRATEGIES[strategy](_Context(arrays), **params)
+    metrics, daily = evaluate(arrays["close"], positions, cost_bps)
+    returns = pd.Series(daily, index=index, name="return")
+    return {
+        **metrics,
+        "returns": returns,
+        "equity": (1 + returns).cumprod().rename("equity"),
+        "positions": pd.DataFrame(positions, index=index, columns=columns),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep of a backtest strategy over stored history.")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="ma_cross")
+    parser.add_argument("--symbols", default="", help="Comma-separated NSE symbols (default: every stored history)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_COST_BPS)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="write every result as CSV here")
+    args = parser.parse_args()
+
+    if args.symbols:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    else:
+        from analytics.portfolio import universe_symbols
+        symbols = universe_symbols()
+
+    results = sweep(args.strategy, symbols, workers=args.workers, cost_bps=args.cost_bps)
+    print(results.head(args.top).to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"[✓] Wrote {len(results)} results to {args.out}")
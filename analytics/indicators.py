@@ -0,0 +1,349 @@
+# analytics/indicators.py
+
+import numpy as np
+import pandas as pd
+
+from ingestion.historical import load_historical
+
+# All batch indicators take "wide" panels: one row per bar, one column per symbol,
+# so a single call covers the whole universe. Recursive indicators use pandas'
+# compiled ewm/rolling kernels; nothing loops over bars in Python.
+
+TRADING_DAYS = 252
+
+
+def load_panel(symbols, fields=("Open", "High", "Low", "Close", "Volume")):
+    """
+    Load stored history for 'symbols' and align it into wide panels.
+
+    Returns:
+        dict: field -> DataFrame indexed by date with one column per symbol.
+    """
+    frames = {s.upper(): load_historical(s) for s in symbols}
+    frames = {s: df for s, df in frames.items() if not df.empty}
+    if not frames:
+        return {field: pd.DataFrame() for field in fields}
+    stacked = pd.concat(frames, axis=1)
+    return {field: stacked.xs(field, axis=1, level=1).astype("float64") for field in fields}
+
+
+def _frame(x):
+    return x if isinstance(x, pd.DataFrame) else pd.DataFrame(np.asarray(x, dtype="float64"))
+
+
+# ------------------- Batch Indicators ------------------- #
+def sma(close, window=20):
+    return _frame(close).rolling(window, min_periods=window).mean()
+
+
+def ema(close, span=20):
+    return _frame(close).ewm(span=span, adjust=False).mean()
+
+
+def _wilder(x, period):
+    return x.ewm(alpha=1.0 / period, adjust=False).mean()
+
+
+def rsi(close, period=14):
+    delta = _frame(close).diff()
+    avg_gain = _wilder(delta.clip(lower=0), period)
+    avg_loss = _wilder((-delta).clip(lower=0), period)
+    rs = avg_gain / avg_loss
+    return 100 - 100 / (1 + rs)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    Returns:
+        tuple: (macd line, signal line, histogram)
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window=20, k=2.0):
+    """
+    Returns:
+        tuple: (middle, upper, lower) bands using the population std of the window.
+    """
+    roll = _frame(close).rolling(window, min_periods=window)
+    mid = roll.mean()
+    width = k * roll.std(ddof=0)
+    return mid, mid + width, mid - width
+
+
+def true_range(high, low, close):
+    high, low, close = _frame(high), _frame(low), _frame(close)
+    prev_close = close.shift(1)
+    tr = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+    return pd.DataFrame(tr, index=close.index, columns=close.columns)
+
+
+def atr(high, low, close, period=14):
+    return _wilder(true_range(high, low, close), period)
+
+
+def vwap_deviation(close, volume):
+    """
+    Fractional distance of the close from the cumulative volume-weighted average price.
+    """
+    close, volume = _frame(close), _frame(volume)
+    vwap = (close * volume).cumsum() / volume.cumsum()
+    return close / vwap - 1
+
+
+def rolling_volatility(close, window=20, annualize=TRADING_DAYS):
+    log_ret = np.log(_frame(close)).diff()
+    return log_ret.rolling(window, min_periods=window).std() * np.sqrt(annualize)
+
+
+def drawdown(close):
+    close = _frame(close)
+    return close / close.cummax() - 1
+
+
+def compute_indicators(panel):
+    """
+    Compute every indicator for a panel from load_panel.
+
+    Returns:
+        dict: indicator name -> wide DataFrame (bars x symbols).
+    """
+    close = panel["Close"]
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_mid, bb_upper, bb_lower = bollinger(close)
+    return {
+        "sma": sma(close, 20),
+        "ema": ema(close, 20),
+        "rsi": rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_hist": macd_hist,
+        "bb_mid": bb_mid,
+        "bb_upper": bb_upper,
+        "bb_lower": bb_lower,
+        "atr": atr(panel["High"], panel["Low"], close, 14),
+        "vwap_dev": vwap_deviation(close, panel["Volume"]),
+        "volatility": rolling_volatility(close, 20),
+        "drawdown": drawdown(close),
+    }
+
+
+# ------------------- Incremental Updates ------------------- #
+class _RollingWindow:
+    """
+    Ring buffer of the last 'size' rows for N symbols with running sum and sum of squares.
+
+    NaNs are kept out of the sums and counted per column, so a missing value in
+    one symbol never leaks into another's statistics; a column only reports a
+    value once its window holds 'size' valid entries, like rolling(min_periods=size).
+    """
+
+    def __init__(self, size, width):
+        self.size = size
+        self.buf = np.full((size, width), np.nan)
+        self.pos = 0
+        self.valid = np.zeros(width, dtype=np.int64)
+        self.total = np.zeros(width)
+        self.total_sq = np.zeros(width)
+
+    def push(self, values):
+        values = np.asarray(values, dtype="float64")
+        old = self.buf[self.pos]
+        old_ok, new_ok = ~np.isnan(old), ~np.isnan(values)
+        old_v, new_v = np.where(old_ok, old, 0.0), np.where(new_ok, values, 0.0)
+        self.total += new_v - old_v
+        self.total_sq += new_v * new_v - old_v * old_v
+        self.valid += new_ok.astype(np.int64) - old_ok
+        self.buf[self.pos] = values
+        self.pos = (self.pos + 1) % self.size
+
+    def fill(self, rows):
+        """
+        Seed the window from the trailing rows of a (bars x symbols) array.
+        """
+        rows = rows[-self.size:]
+        self.buf[:] = np.nan
+        self.buf[:len(rows)] = rows
+        self.pos = len(rows) % self.size
+        ok = ~np.isnan(rows)
+        vals = np.where(ok, rows, 0.0)
+        self.valid = ok.sum(axis=0)
+        self.total = vals.sum(axis=0)
+        self.total_sq = (vals * vals).sum(axis=0)
+
+    def mean(self):
+        return np.where(self.valid == self.size, self.total / self.size, np.nan)
+
+    def std(self, ddof=0):
+        var = (self.total_sq - self.total ** 2 / self.size) / (self.size - ddof)
+        return np.where(self.valid == self.size, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def _ema_alpha(span):
+    return 2.0 / (span + 1)
+
+
+class IncrementalIndicators:
+    """
+    O(1)-per-bar indicator state for a fixed list of symbols.
+
+    Seed it from history with from_panel(), then call update() with the newest
+    bar for every symbol (1-D arrays ordered like 'symbols'). Each update touches
+    only running sums and EMA states, never the full history.
+    """
+
+    def __init__(self, symbols, sma_window=20, ema_span=20, rsi_period=14,
+                 macd_fast=12, macd_slow=26, macd_signal=9,
+                 bb_window=20, bb_k=2.0, atr_period=14, vol_window=20):
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+        self.params = dict(sma_window=sma_window, ema_span=ema_span, rsi_period=rsi_period,
+                           macd_fast=macd_fast, macd_slow=macd_slow, macd_signal=macd_signal,
+                           bb_window=bb_window, bb_k=bb_k, atr_period=atr_period, vol_window=vol_window)
+
+        self.sma_win = _RollingWindow(sma_window, n)
+        self.bb_win = self.sma_win if bb_window == sma_window else _RollingWindow(bb_window, n)
+        self.vol_win = _RollingWindow(vol_window, n)
+
+        nan = np.full(n, np.nan)
+        self.ema = nan.copy()
+        self.ema_fast = nan.copy()
+        self.ema_slow = nan.copy()
+        self.macd_signal = nan.copy()
+        self.avg_gain = nan.copy()
+        self.avg_loss = nan.copy()
+        self.atr = nan.copy()
+        self.prev_close = nan.copy()
+        self.peak = nan.copy()
+        self.cum_pv = np.zeros(n)
+        self.cum_v = np.zeros(n)
+        self.latest = {}
+
+    @staticmethod
+    def _ewm_step(state, value, alpha):
+        return np.where(np.isnan(state), value, state + alpha * (value - state))
+
+    def update(self, close, high=None, low=None, volume=None):
+        """
+        Fold one new bar per symbol into the state and return the latest indicator values.
+        """
+        p = self.params
+        close = np.asarray(close, dtype="float64")
+        high = close if high is None else np.asarray(high, dtype="float64")
+        low = close if low is None else np.asarray(low, dtype="float64")
+        volume = np.zeros_like(close) if volume is None else np.asarray(volume, dtype="float64")
+        prev = self.prev_close
+
+        # A missing close carries the last one forward, matching from_panel's ffill;
+        # symbols with no close yet stay NaN and are masked out of every sum.
+        missing = np.isnan(close)
+        close = np.where(missing, prev, close)
+        high = np.where(np.isnan(high), close, high)
+        low = np.where(np.isnan(low), close, low)
+        volume = np.where(missing | np.isnan(volume), 0.0, volume)
+
+        self.sma_win.push(close)
+        if self.bb_win is not self.sma_win:
+            self.bb_win.push(close)
+
+        self.ema = self._ewm_step(self.ema, close, _ema_alpha(p["ema_span"]))
+        self.ema_fast = self._ewm_step(self.ema_fast, close, _ema_alpha(p["macd_fast"]))
+        self.ema_slow = self._ewm_step(self.ema_slow, close, _ema_alpha(p["macd_slow"]))
+        macd_line = self.ema_fast - self.ema_slow
+        self.macd_signal = self._ewm_step(self.macd_signal, macd_line, _ema_alpha(p["macd_signal"]))
+
+        has_prev = ~np.isnan(prev)
+        delta = np.where(has_prev, close - prev, np.nan)
+        rsi_alpha = 1.0 / p["rsi_period"]
+        self.avg_gain = np.where(has_prev, self._ewm_step(self.avg_gain, np.maximum(delta, 0), rsi_alpha), self.avg_gain)
+        self.avg_loss = np.where(has_prev, self._ewm_step(self.avg_loss, np.maximum(-delta, 0), rsi_alpha), self.avg_loss)
+
+        tr = np.where(has_prev,
+                      np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev))),
+                      high - low)
+        self.atr = self._ewm_step(self.atr, tr, 1.0 / p["atr_period"])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.vol_win.push(np.log(close / prev))
+
+        self.cum_pv += np.where(np.isnan(close), 0.0, close * volume)
+        self.cum_v += volume
+        self.peak = np.fmax(self.peak, close)
+        self.prev_close = close
+
+        return self._snapshot(close, macd_line)
+
+    def _snapshot(self, close, macd_line):
+        p = self.params
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = self.avg_gain / self.avg_loss
+            bb_mid = self.bb_win.mean()
+            bb_width = p["bb_k"] * self.bb_win.std(ddof=0)
+            self.latest = {
+                "sma": self.sma_win.mean(),
+                "ema": self.ema,
+                "rsi": 100 - 100 / (1 + rs),
+                "macd": macd_line,
+                "macd_signal": self.macd_signal,
+                "macd_hist": macd_line - self.macd_signal,
+                "bb_mid": bb_mid,
+                "bb_upper": bb_mid + bb_width,
+                "bb_lower": bb_mid - bb_width,
+                "atr": self.atr,
+                "vwap_dev": close / (self.cum_pv / self.cum_v) - 1,
+                "volatility": self.vol_win.std(ddof=1) * np.sqrt(TRADING_DAYS),
+                "drawdown": close / self.peak - 1,
+            }
+        return self.latest
+
+    def latest_frame(self):
+        """
+        The most recent indicator values as a (symbols x indicators) DataFrame.
+        """
+        return pd.DataFrame(self.latest, index=self.symbols)
+
+    @classmethod
+    def from_panel(cls, panel, **params):
+        """
+        Build state from a history panel with the batch kernels, so seeding is
+        vectorized too; every later bar goes through update().
+
+        Each symbol is seeded from its own first valid bar: younger listings
+        keep leading NaNs instead of truncating everyone else's history.
+        """
+        close = panel["Close"].ffill().dropna(how="all")
+        high = panel["High"].reindex_like(close).fillna(close)
+        low = panel["Low"].reindex_like(close).fillna(close)
+        volume = panel["Volume"].reindex_like(close).fillna(0)
+
+        state = cls(close.columns, **params)
+        if close.empty:
+            return state
+        p = state.params
+
+        def last(df):
+            return df.iloc[-1].to_numpy(dtype="float64")
+
+        fast, slow = ema(close, p["macd_fast"]), ema(close, p["macd_slow"])
+        delta = close.diff()
+        state.ema = last(ema(close, p["ema_span"]))
+        state.ema_fast, state.ema_slow = last(fast), last(slow)
+        state.macd_signal = last((fast - slow).ewm(span=p["macd_signal"], adjust=False).mean())
+        state.avg_gain = last(_wilder(delta.clip(lower=0), p["rsi_period"]))
+        state.avg_loss = last(_wilder((-delta).clip(lower=0), p["rsi_period"]))
+        state.atr = last(atr(high, low, close, p["atr_period"]))
+
+        c, v = close.to_numpy(dtype="float64"), volume.to_numpy(dtype="float64")
+        state.sma_win.fill(c)
+        if state.bb_win is not state.sma_win:
+            state.bb_win.fill(c)
+        state.vol_win.fill(np.diff(np.log(c), axis=0))
+        state.cum_pv = np.nansum(c * v, axis=0)
+        state.cum_v = np.where(np.isnan(c), 0.0, v).sum(axis=0)
+        state.peak = np.fmax.reduce(c, axis=0)
+        state.prev_close = c[-1]
+
+        state._snapshot(c[-1], state.ema_fast - state.ema_slow)
+        return state
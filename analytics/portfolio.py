@@ -0,0 +1,393 @@
+# analytics/portfolio.py
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.instrumentation import timed
+from ingestion.historical import DATA_DIR, load_historical, ohlcv_path
+
+# Cross-sectional analytics over the whole universe. Closes are aligned into one
+# (bars x symbols) matrix; correlation/covariance come from running sums over the
+# lookback window, so a new or revised latest bar only folds in the rows that changed.
+
+BENCHMARK_SYMBOL = "NIFTY"
+# Optional symbol -> sector mapping (columns: Symbol, Sector)
+SECTORS_CSV = os.path.join(DATA_DIR, "sectors.csv")
+UNCLASSIFIED = "Unclassified"
+
+LOOKBACK = 252
+BETA_WINDOW = 60
+MIN_PERIODS = 20
+# Incremental sums drift slightly with every add/remove; rebuild them from scratch this often
+REBUILD_EVERY = 500
+
+
+def load_sectors(path=SECTORS_CSV):
+    """
+    Returns:
+        dict: symbol -> sector, empty if the mapping file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path)
+    return dict(zip(df["Symbol"].str.upper(), df["Sector"]))
+
+
+def _file_key(symbol):
+    try:
+        stat = os.stat(ohlcv_path(symbol))
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+
+def _first_changed_row(old_index, old_values, new_index, new_values):
+    """
+    Length of the leading run of rows that are identical (dates and values, NaN == NaN)
+    in both matrices; everything after it has to be recomputed.
+    """
+    if old_values.shape[1] != new_values.shape[1]:
+        return 0
+    n = min(len(old_index), len(new_index))
+    same = old_index[:n] == new_index[:n]
+    a, b = old_values[:n], new_values[:n]
+    same &= ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+    changed = np.flatnonzero(~same)
+    return int(changed[0]) if changed.size else n
+
+
+class _PairwiseMoments:
+    """
+    Pairwise-complete sums for N return series: for every pair (i, j), the count of rows
+    where both are present and the sums of x_i, x_i^2 and x_i*x_j over those rows.
+    Rows can be added or removed, so a sliding window costs O(changed rows x N^2).
+    """
+
+    def __init__(self, width):
+        self.n = np.zeros((width, width))
+        self.sx = np.zeros((width, width))
+        self.sxx = np.zeros((width, width))
+        self.sxy = np.zeros((width, width))
+
+    def copy(self):
+        other = _PairwiseMoments.__new__(_PairwiseMoments)
+        other.n, other.sx, other.sxx, other.sxy = self.n.copy(), self.sx.copy(), self.sxx.copy(), self.sxy.copy()
+        return other
+
+    def add(self, rows, sign=1.0):
+        if not len(rows):
+            return
+        present = ~np.isnan(rows)
+        x = np.where(present, rows, 0.0)
+        m = present.astype("float64")
+        self.n += sign * (m.T @ m)
+        self.sx += sign * (x.T @ m)
+        self.sxx += sign * ((x * x).T @ m)
+        self.sxy += sign * (x.T @ x)
+
+    def covariance(self, min_periods=MIN_PERIODS):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (self.sxy - self.sx * self.sx.T / self.n) / (self.n - 1)
+        cov[self.n < min_periods] = np.nan
+        return cov
+
+    def correlation(self, min_periods=MIN_PERIODS):
+        sy, syy = self.sx.T, self.sxx.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            num = self.n * self.sxy - self.sx * sy
+            den = np.sqrt(np.maximum(self.n * self.sxx - self.sx ** 2, 0) * np.maximum(self.n * syy - sy ** 2, 0))
+            corr = np.clip(num / den, -1.0, 1.0)
+        corr[self.n < min_periods] = np.nan
+        return corr
+
+
+def rolling_beta(returns, benchmark, window=BETA_WINDOW, min_periods=MIN_PERIODS):
+    """
+    Rolling OLS beta of every column of 'returns' against the 'benchmark' series.
+    """
+    bench = benchmark.reindex(returns.index)
+    cov = returns.rolling(window, min_periods=min_periods).cov(bench)
+    return cov.div(bench.rolling(window, min_periods=min_periods).var(), axis=0)
+
+
+class PortfolioSnapshot:
+    """
+    One consistent view of a Portfolio as of a single refresh(): aligned closes and
+    returns, benchmark returns, rolling beta and the window moments.
+
+    Snapshots are never modified once published; refresh() builds the next one and
+    swaps it in, so a snapshot being rendered cannot change underneath its reader.
+    """
+
+    def __init__(self, close, returns, benchmark_returns, benchmark_name, beta, moments,
+                 lookback=LOOKBACK, beta_window=BETA_WINDOW, sectors=None):
+        self.close = close
+        self.returns = returns
+        self.benchmark_returns = benchmark_returns
+        self.benchmark_name = benchmark_name
+        self._beta = beta
+        self._moments = moments
+        self.lookback = lookback
+        self.beta_window = beta_window
+        self.sectors = sectors
+
+    @classmethod
+    def empty(cls, **kwargs):
+        return cls(pd.DataFrame(), pd.DataFrame(), pd.Series(dtype="float64"), None, pd.DataFrame(), None, **kwargs)
+
+    # ------------------- Matrices ------------------- #
+    def correlation(self, min_periods=MIN_PERIODS):
+        """
+        Pairwise-complete correlation of daily returns over the last 'lookback' bars.
+        """
+        if self._moments is None:
+            return pd.DataFrame()
+        cols = self.returns.columns
+        return pd.DataFrame(self._moments.correlation(min_periods), index=cols, columns=cols)
+
+    def covariance(self, annualize=252, min_periods=MIN_PERIODS):
+        if self._moments is None:
+            return pd.DataFrame()
+        cols = self.returns.columns
+        return pd.DataFrame(self._moments.covariance(min_periods) * annualize, index=cols, columns=cols)
+
+    def beta(self):
+        """
+        Rolling beta of each symbol against the benchmark (bars x symbols).
+        """
+        return self._beta
+
+    def latest_beta(self):
+        return self._beta.ffill().iloc[-1] if not self._beta.empty else pd.Series(dtype="float64")
+
+    # ------------------- Cross-Section ------------------- #
+    def sector_map(self):
+        sectors = self.sectors if self.sectors is not None else load_sectors()
+        return pd.Series({s: sectors.get(s, UNCLASSIFIED) for s in self.close.columns}, name="Sector")
+
+    def sector_returns(self):
+        """
+        Equal-weighted daily return of every sector (bars x sectors), from one matrix product.
+        """
+        if self.returns.empty:
+            return pd.DataFrame()
+        membership = pd.get_dummies(self.sector_map()).astype("float64")
+        r = self.returns.to_numpy()
+        present = ~np.isnan(r)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = (np.where(present, r, 0.0) @ membership.to_numpy()) / (present @ membership.to_numpy())
+        return pd.DataFrame(out, index=self.returns.index, columns=membership.columns)
+
+    def horizon_returns(self, bars=1):
+        """
+        Return of every symbol over the last 'bars' bars.
+        """
+        if len(self.close) <= bars:
+            return pd.Series(np.nan, index=self.close.columns)
+        return self.close.iloc[-1] / self.close.iloc[-1 - bars] - 1
+
+    def sector_summary(self, horizons=(1, 5, 21, 63)):
+        """
+        Per sector: members, mean return over each horizon (in bars), annualized
+        volatility of the equal-weighted sector series, mean beta and the average
+        pairwise correlation between its members.
+        """
+        if self.close.empty:
+            return pd.DataFrame()
+        sectors = self.sector_map()
+        table = pd.DataFrame({"Members": sectors.value_counts()})
+        for bars in horizons:
+            table[f"Return {bars}d"] = self.horizon_returns(bars).groupby(sectors).mean()
+        table["Volatility"] = self.sector_returns().iloc[-self.lookback:].std() * np.sqrt(252)
+        table["Beta"] = self.latest_beta().groupby(sectors).mean()
+
+        corr = self._moments.correlation() if self._moments is not None else None
+        avg_corr = {}
+        for sector, members in sectors.groupby(sectors).groups.items():
+            idx = self.close.columns.get_indexer(members)
+            if corr is None or len(idx) < 2:
+                avg_corr[sector] = np.nan
+                continue
+            block = corr[np.ix_(idx, idx)]
+            avg_corr[sector] = np.nanmean(block[~np.eye(len(idx), dtype=bool)])
+        table["Avg Correlation"] = pd.Series(avg_corr)
+        return table.sort_values(f"Return {horizons[0]}d", ascending=False)
+
+    def top_movers(self, n=10, bars=1):
+        """
+        Returns:
+            tuple: (gainers, losers) DataFrames with Close, Return and Sector.
+        """
+        moves = pd.DataFrame({
+            "Close": self.close.iloc[-1] if not self.close.empty else pd.Series(dtype="float64"),
+            "Return": self.horizon_returns(bars),
+            "Sector": self.sector_map(),
+        }).dropna(subset=["Return"])
+        return moves.nlargest(n, "Return"), moves.nsmallest(n, "Return")
+
+
+class Portfolio:
+    """
+    Keeps a PortfolioSnapshot of a fixed list of symbols up to date.
+
+    refresh() re-reads only the symbols whose stored history changed and recomputes
+    only from the first changed bar: when just the latest bar is new or revised, the
+    moments and the beta tail are updated instead of rebuilt. The work happens on
+    copies under the lock and the finished snapshot is swapped in at the end.
+    """
+
+    def __init__(self, symbols, benchmark=BENCHMARK_SYMBOL, lookback=LOOKBACK, beta_window=BETA_WINDOW,
+                 sectors=None):
+        self.symbols = [s.upper() for s in symbols]
+        self.benchmark = benchmark.upper() if benchmark else None
+        self.lookback = lookback
+        self.beta_window = beta_window
+        self.sectors = sectors
+
+        self._snapshot = PortfolioSnapshot.empty(**self._snapshot_config())
+        self._series = {}
+        self._file_keys = {}
+        self._incremental_updates = 0
+        self._lock = threading.Lock()
+
+    def _snapshot_config(self):
+        return {"lookback": self.lookback, "beta_window": self.beta_window, "sectors": self.sectors}
+
+    def snapshot(self):
+        """
+        The latest published PortfolioSnapshot; safe to read while another refresh runs.
+        """
+        return self._snapshot
+
+    # ------------------- Loading ------------------- #
+    def _load_changed(self):
+        changed = False
+        for symbol in [*self.symbols, *([self.benchmark] if self.benchmark else [])]:
+            key = _file_key(symbol)
+            if key is not None and self._file_keys.get(symbol) == key:
+                continue
+            # load_historical converts a legacy CSV on first use, so stat again afterwards
+            close = load_historical(symbol)["Close"].astype("float64")
+            self._file_keys[symbol] = _file_key(symbol)
+            previous = self._series.get(symbol)
+            if previous is None or not previous.equals(close):
+                self._series[symbol] = close
+                changed = True
+        return changed
+
+    def _aligned_close(self):
+        frames = {s: self._series[s] for s in self.symbols if s in self._series and not self._series[s].empty}
+        if not frames:
+            return pd.DataFrame()
+        raw = pd.concat(frames, axis=1).sort_index()
+        # Carry the last close over days a symbol did not trade so returns stay aligned, but
+        # not past its last stored bar: a delisted symbol must not feed zero returns forever
+        stored_through = np.maximum.accumulate(raw.notna().to_numpy()[::-1], axis=0)[::-1]
+        return raw.ffill().where(stored_through)
+
+    def _benchmark_returns(self, close, returns):
+        """
+        Returns:
+            tuple: (benchmark name, benchmark return series aligned to 'returns')
+        """
+        bench = self._series.get(self.benchmark) if self.benchmark else None
+        if bench is not None and not bench.empty:
+            return self.benchmark, bench.reindex(close.index).ffill().pct_change(fill_method=None).iloc[1:]
+        # No stored index history: fall back to the equal-weighted universe
+        return "EQUAL_WEIGHT", returns.mean(axis=1)
+
+    @timed
+    def refresh(self):
+        """
+        Bring the snapshot up to date with the stored histories.
+
+        Returns:
+            Portfolio: self, for chaining.
+        """
+        with self._lock:
+            old = self._snapshot
+            if not self._load_changed() and old._moments is not None:
+                return self
+            close = self._aligned_close()
+            if close.empty:
+                self._snapshot = PortfolioSnapshot.empty(**self._snapshot_config())
+                return self
+
+            first_changed = 0
+            if old._moments is not None and list(close.columns) == list(old.close.columns):
+                first_changed = _first_changed_row(old.close.index.values, old.close.to_numpy(),
+                                                   close.index.values, close.to_numpy())
+
+            values = close.to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = pd.DataFrame(values[1:] / values[:-1] - 1, index=close.index[1:], columns=close.columns)
+            benchmark_name, benchmark_returns = self._benchmark_returns(close, returns)
+            benchmark_clean = _first_changed_row(old.benchmark_returns.index.values,
+                                                 old.benchmark_returns.to_numpy()[:, None],
+                                                 benchmark_returns.index.values, benchmark_returns.to_numpy()[:, None])
+
+            # Return row k uses closes k and k+1, so it is stale from close row first_changed - 1
+            clean_rows = max(first_changed - 1, 0)
+            moments = self._next_moments(old, returns, clean_rows)
+            beta = self._next_beta(old, returns, benchmark_returns, min(clean_rows, benchmark_clean))
+            self._snapshot = PortfolioSnapshot(close, returns, benchmark_returns, benchmark_name, beta, moments,
+                                               **self._snapshot_config())
+        return self
+
+    def _next_moments(self, old, returns, clean_rows):
+        old_len, new_len = len(old.returns), len(returns)
+        old_start, new_start = max(old_len - self.lookback, 0), max(new_len - self.lookback, 0)
+        keep_start = max(old_start, new_start)
+        if old._moments is None or clean_rows <= keep_start or self._incremental_updates >= REBUILD_EVERY:
+            moments = _PairwiseMoments(returns.shape[1])
+            moments.add(returns.to_numpy()[new_start:])
+            self._incremental_updates = 0
+            return moments
+
+        # Rows [keep_start, clean_rows) sit in both windows unchanged; swap out everything else
+        moments = old._moments.copy()
+        before, after = old.returns.to_numpy(), returns.to_numpy()
+        moments.add(before[old_start:keep_start], sign=-1.0)
+        moments.add(before[clean_rows:], sign=-1.0)
+        moments.add(after[new_start:keep_start])
+        moments.add(after[clean_rows:])
+        self._incremental_updates += 1
+        return moments
+
+    def _next_beta(self, old, returns, benchmark_returns, clean_rows):
+        if old._beta.empty or list(old._beta.columns) != list(returns.columns) or clean_rows == 0:
+            return rolling_beta(returns, benchmark_returns, self.beta_window)
+        # Only rows from clean_rows on can change; each needs the preceding window as context
+        start = max(clean_rows - self.beta_window + 1, 0)
+        tail = rolling_beta(returns.iloc[start:], benchmark_returns, self.beta_window)
+        return pd.concat([old._beta.iloc[:clean_rows], tail.iloc[clean_rows - start:]])
+
+
+_portfolio_lock = threading.Lock()
+_portfolios = {}
+
+
+def universe_symbols():
+    """
+    Every symbol with stored history, excluding the benchmark itself.
+    """
+    from ingestion.entities import symbol_universe
+    return sorted(s for s in symbol_universe() if s != BENCHMARK_SYMBOL and (
+        _file_key(s) is not None or os.path.exists(os.path.join(DATA_DIR, f"{s}_historical_data.csv"))))
+
+
+def get_portfolio(symbols=None, benchmark=BENCHMARK_SYMBOL, lookback=LOOKBACK, beta_window=BETA_WINDOW):
+    """
+    Snapshot of the shared Portfolio for this symbol list, refreshed first; repeated
+    calls (from any session) reuse its cached matrices.
+    """
+    symbols = tuple(sorted(s.upper() for s in (symbols or universe_symbols())))
+    key = (symbols, benchmark, lookback, beta_window)
+    with _portfolio_lock:
+        portfolio = _portfolios.get(key)
+        if portfolio is None:
+            portfolio = _portfolios[key] = Portfolio(symbols, benchmark, lookback, beta_window)
+    return portfolio.refresh().snapshot()
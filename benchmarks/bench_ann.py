@@ -0,0 +1,64 @@
+# benchmarks/bench_ann.py
+#
+# Recall/latency comparison of the rag index types on a synthetic corpus.
+# Exact flat inner-product search is the ground truth. Run from the project root:
+#
+#     python -m benchmarks.bench_ann --n 100000 --dim 768 --queries 1000
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from rag.faiss_index import INDEX_TYPES, build_index, default_nlist, prepare_vectors, set_search_params
+
+def synthetic_corpus(n, dim, n_clusters=256, seed=0):
+    """
+    Gaussian blobs around random centres, a rough stand-in for topic-clustered sentence embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+    return centres[labels] + 0.35 * rng.standard_normal((n, dim)).astype("float32")
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / (len(truth) * k)
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN index benchmark")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--types", nargs="+", default=[t for t in INDEX_TYPES if t != "flat_l2"])
+    args = parser.parse_args()
+
+    print(f"[~] Generating {args.n} x {args.dim} corpus and {args.queries} queries...")
+    corpus = synthetic_corpus(args.n + args.queries, args.dim)
+    corpus, queries = corpus[:args.n], corpus[args.n:]
+    queries = prepare_vectors(queries, "flat_ip")
+
+    truth = None
+    print(f"{'index':<10}{'build s':>10}{'QPS':>12}{'recall@' + str(args.k):>12}{'MB':>10}")
+    for index_type in ["flat_ip"] + [t for t in args.types if t != "flat_ip"]:
+        started = time.perf_counter()
+        index = build_index(corpus, index_type=index_type, nlist=default_nlist(args.n))
+        build_s = time.perf_counter() - started
+        set_search_params(index, nprobe=args.nprobe, ef_search=args.ef_search)
+
+        started = time.perf_counter()
+        _, found = index.search(queries, args.k)
+        qps = len(queries) / (time.perf_counter() - started)
+
+        if truth is None:
+            truth = found
+        memory_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+        print(f"{index_type:<10}{build_s:>10.2f}{qps:>12.0f}{recall_at_k(found, truth):>12.3f}{memory_mb:>10.1f}")
+
+if __name__ == "__main__":
+    main()
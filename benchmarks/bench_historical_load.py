@@ -0,0 +1,47 @@
+# benchmarks/bench_historical_load.py
+#
+# Compare loading stored history from the legacy JSON-in-CSV files against the
+# normalized .npz files. Run from the project root:
+#
+#     python -m benchmarks.bench_historical_load --repeat 50
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from ingestion.historical import DATA_DIR, load_ohlcv, read_legacy_csv, save_ohlcv
+
+def _best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    csv_files = sorted(glob.glob(os.path.join(DATA_DIR, "*_historical_data.csv")))
+    if not csv_files:
+        print("❌ No legacy *_historical_data.csv files found in data/")
+        return
+
+    print(f"{'symbol':<10}{'bars':>8}{'csv ms':>12}{'npz ms':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for csv_path in csv_files:
+            symbol = os.path.basename(csv_path).split("_")[0]
+            df = read_legacy_csv(csv_path)
+            npz_path = os.path.join(tmp, f"{symbol}.npz")
+            save_ohlcv(df, npz_path)
+
+            csv_s = _best_of(lambda: read_legacy_csv(csv_path), args.repeat)
+            npz_s = _best_of(lambda: load_ohlcv(npz_path), args.repeat)
+            print(f"{symbol:<10}{len(df):>8}{csv_s * 1e3:>12.2f}{npz_s * 1e3:>12.2f}{csv_s / npz_s:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
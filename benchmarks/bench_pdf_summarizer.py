@@ -0,0 +1,46 @@
+# benchmarks/bench_pdf_summarizer.py
+#
+# Pages/sec for PDF extraction + token-aware chunking, and for end-to-end
+# summarization with each model option. Run from the project root:
+#
+#     python -m benchmarks.bench_pdf_summarizer path/to/report.pdf --models bart distilbart --quantize
+
+import argparse
+import os
+import time
+
+from ingestion.historical import DATA_DIR
+from ingestion.pdf_summarizer import iter_chunks, iter_pdf_pages, load_summarizer, summarize_pages
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF summarizer benchmark")
+    parser.add_argument("pdf", nargs="?", default=os.path.join(DATA_DIR, "unit-2 (2)_summary.pdf"))
+    parser.add_argument("--models", nargs="+", default=["bart", "distilbart"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--quantize", action="store_true", help="also time int8 dynamic quantization")
+    parser.add_argument("--map-reduce", action="store_true")
+    args = parser.parse_args()
+
+    pages = list(iter_pdf_pages(args.pdf))
+    n_pages = len(pages)
+    print(f"[~] {args.pdf}: {n_pages} pages, {sum(len(p.split()) for p in pages)} words")
+
+    print(f"{'model':<18}{'stage':<12}{'seconds':>10}{'pages/s':>10}{'chunks':>8}")
+    for model in args.models:
+        for quantize in ([False, True] if args.quantize else [False]):
+            label = model + ("+int8" if quantize else "")
+            tokenizer = load_summarizer(model, quantize).tokenizer  # load outside the timed region
+
+            started = time.perf_counter()
+            chunks = list(iter_chunks(iter_pdf_pages(args.pdf), tokenizer))
+            elapsed = time.perf_counter() - started
+            print(f"{label:<18}{'chunking':<12}{elapsed:>10.2f}{n_pages / elapsed:>10.1f}{len(chunks):>8}")
+
+            started = time.perf_counter()
+            summarize_pages(iter_pdf_pages(args.pdf), model=model, quantize=quantize,
+                            batch_size=args.batch_size, map_reduce=args.map_reduce)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<18}{'summarize':<12}{elapsed:>10.2f}{n_pages / elapsed:>10.2f}{len(chunks):>8}")
+
+if __name__ == "__main__":
+    main()
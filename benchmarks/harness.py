@@ -0,0 +1,116 @@
+# benchmarks/harness.py
+#
+# Timing helpers shared by the benchmarks: repeated measurement with latency
+# percentiles, throughput and peak RSS, emitted as JSON-ready dicts.
+
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from core.models import resident_memory_mb
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(name, fn, repeat=5, items=1, setup=None, warmup=1, **extra):
+    """
+    Time 'fn' 'repeat' times (after 'warmup' untimed calls).
+
+    Args:
+        items (int): units of work per call (ticks, headlines, pages...), for throughput.
+        setup (callable): run before every call, outside the timed region.
+
+    Returns:
+        dict: name, repeat, items, items_per_sec (at the median), p50/p90/p99/max seconds,
+        RSS growth over the run and process peak RSS, plus any 'extra' fields.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    rss_before = resident_memory_mb()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    arr = np.asarray(timings, dtype=float)
+    p50 = float(np.percentile(arr, 50))
+    return {
+        "name": name,
+        "repeat": repeat,
+        "items": items,
+        "items_per_sec": round(items / p50, 2) if p50 > 0 else None,
+        "p50": p50,
+        "p90": float(np.percentile(arr, 90)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+        "rss_growth_mb": round(resident_memory_mb() - rss_before, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        **extra,
+    }
+
+
+@contextlib.contextmanager
+def patched(target, **attrs):
+    """
+    Temporarily replace module/object attributes (e.g. data paths or API URLs).
+    """
+    saved = {name: getattr(target, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(target, name, value)
+    try:
+        yield target
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+
+def environment():
+    """
+    What the numbers were measured on, so runs from different versions can be compared.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_report(results, path=None, **meta):
+    """
+    Dump {"environment", "meta", "results"} as JSON to 'path', or stdout when path is None.
+    """
+    report = {"environment": environment(), "meta": meta, "results": results}
+    text = json.dumps(report, indent=2, default=str)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
@@ -0,0 +1,213 @@
+# benchmarks/run_all.py
+#
+# Offline benchmark suite for the hot paths, on synthetic data at a chosen scale.
+# Network calls go to a local stub server. Run from the project root:
+#
+#     python -m benchmarks.run_all --scale small --out bench.json
+#     python -m benchmarks.run_all --only realtime historical dashboard
+#
+# Benchmarks whose dependencies (models, faiss, nltk data...) are unavailable are
+# reported with an "error" field instead of aborting the run.
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks import synthetic
+from benchmarks.harness import measure, patched, write_report
+from benchmarks.stub_server import StubServer
+
+
+def bench_realtime(scale, tmp):
+    """
+    One poll of every symbol through get_realtime_data + TickStore.append, against the stub.
+    """
+    from ingestion import real_time
+    from ingestion.rate_limiter import RateLimiter
+    from ingestion.tick_store import TickStore
+
+    names = synthetic.symbols(scale["symbols"])
+    store = TickStore(os.path.join(tmp, "ticks"))
+    with StubServer(names=names, latency=0.002) as stub, \
+            patched(real_time, BASE_URL=stub.url + "/api/quote-equity",
+                    nse_limiter=RateLimiter(rate=1e6, burst=1e6)):
+        return [measure("realtime.poll_once", lambda: real_time.poll_once(list(names), store=store, max_workers=8),
+                        repeat=20, items=len(names), unit="quotes")]
+
+
+def bench_tick_store(scale, tmp):
+    from ingestion.tick_store import TickStore
+
+    names = synthetic.symbols(scale["symbols"])
+    batches = synthetic.ticks(names, max(1, scale["ticks"] // len(names)))
+    root = os.path.join(tmp, "ticks-append")
+    n = sum(len(b) for b in batches)
+
+    def append_all():
+        store = TickStore(root)
+        for batch in batches:
+            store.append(batch)
+
+    append = measure("tick_store.append", append_all, repeat=3, items=n,
+                     setup=lambda: shutil.rmtree(root, ignore_errors=True), unit="ticks")
+    read = measure("tick_store.read", lambda: TickStore(root).read(), repeat=5, items=n, unit="ticks")
+    return [append, read]
+
+
+def bench_historical(scale, tmp):
+    from ingestion import historical
+
+    payload = synthetic.history_payload("SYM0001", scale["bars"])
+    parse = measure("historical.normalize_historical", lambda: historical.normalize_historical(payload["data"]),
+                    repeat=10, items=scale["bars"], unit="bars")
+
+    data_dir = os.path.join(tmp, "history")
+    os.makedirs(data_dir, exist_ok=True)
+
+    def cold_start():
+        for f in os.listdir(data_dir):
+            os.remove(os.path.join(data_dir, f))
+
+    with StubServer(bars=scale["bars"]) as stub, \
+            patched(historical, DATA_DIR=data_dir, API_URL=stub.url + "/historical/"):
+        fetch = measure("historical.fetch_historical_data", lambda: historical.fetch_historical_data("SYM0001", force=True),
+                        repeat=5, items=scale["bars"], setup=cold_start, unit="bars")
+        fresh = measure("historical.fetch_historical_data[ttl-hit]", lambda: historical.fetch_historical_data("SYM0001"),
+                        repeat=20, items=scale["bars"], unit="bars")
+    return [parse, fetch, fresh]
+
+
+def bench_sentiment(scale, tmp):
+    from ingestion import entities, sentiment, tick_store
+
+    news = synthetic.headlines(scale["headlines"])
+    paths = {name: os.path.join(tmp, f"{name.lower()}.csv") for name in ("INPUT_FILE", "OUTPUT_CSV", "HOURLY_CSV")}
+    paths["OUTPUT_TXT"] = os.path.join(tmp, "sentiment.txt")
+    news.to_csv(paths["INPUT_FILE"], index=False)
+
+    def fresh_run():
+        for key in ("OUTPUT_CSV", "OUTPUT_TXT", "HOURLY_CSV"):
+            if os.path.exists(paths[key]):
+                os.remove(paths[key])
+
+    # Symbol tagging reads the symbol universe: keep it (and the tick store it opens) inside tmp
+    with patched(sentiment, **paths), patched(entities, DATA_DIR=tmp), \
+            patched(tick_store, TICK_DIR=os.path.join(tmp, "ticks")):
+        full = measure("sentiment.analyze_sentiment[full]", sentiment.analyze_sentiment, repeat=3,
+                       items=len(news), setup=fresh_run, unit="headlines")
+        incremental = measure("sentiment.analyze_sentiment[no-new]", sentiment.analyze_sentiment, repeat=5,
+                              items=len(news), unit="headlines")
+    return [full, incremental]
+
+
+def bench_embeddings(scale, tmp):
+    from rag import embeddings, faiss_index
+
+    passages = synthetic.headlines(scale["passages"])["title"].tolist()
+    queries = passages[:scale["queries"]]
+    with patched(embeddings, EMBEDDING_CACHE_DIR=os.path.join(tmp, "embeddings")):
+        embeddings.get_encoder.cache_clear()
+        encode = measure("faiss_index.encode_text", lambda: faiss_index.encode_text(passages), repeat=1, warmup=0,
+                         items=len(passages), unit="passages")
+        cached = measure("faiss_index.encode_text[cached]", lambda: faiss_index.encode_text(passages), repeat=3,
+                         items=len(passages), unit="passages")
+        index = faiss_index.build_index(faiss_index.encode_text(passages), index_type="flat_ip")
+
+        def search_all():
+            for q in queries:
+                faiss_index.search_faiss_index(q, index, top_k=5)
+
+        search = measure("faiss_index.search_faiss_index", search_all, repeat=3, items=len(queries), unit="queries")
+        embeddings.get_encoder.cache_clear()
+    return [encode, cached, search]
+
+
+def bench_pdf(scale, tmp):
+    from ingestion import pdf_summarizer
+
+    pdf_path = synthetic.write_pdf(os.path.join(tmp, "report.pdf"), scale["pages"])
+    extract = measure("pdf_summarizer.extract_text_from_pdf", lambda: pdf_summarizer.extract_text_from_pdf(pdf_path),
+                      repeat=5, items=scale["pages"], unit="pages")
+    text = pdf_summarizer.extract_text_from_pdf(pdf_path)
+    summarize = measure("pdf_summarizer.summarize_pdf_content", lambda: pdf_summarizer.summarize_pdf_content(text, model="distilbart"),
+                        repeat=1, items=scale["pages"], unit="pages", model="distilbart")
+    return [extract, summarize]
+
+
+def bench_dashboard(scale, tmp):
+    from dashboard import dashboard
+
+    data_dir = os.path.join(tmp, "dashboard")
+    os.makedirs(data_dir, exist_ok=True)
+    synthetic.headlines(scale["headlines"]).to_csv(os.path.join(data_dir, "news_feed.csv"), index=False)
+
+    with patched(dashboard, DATA_PATH=data_dir):
+        cold = measure("dashboard.load_csv[cold]", lambda: dashboard.load_csv("news_feed.csv"), repeat=5,
+                       items=scale["headlines"], setup=dashboard._read_csv_at.clear, unit="rows")
+        warm = measure("dashboard.load_csv[mtime-cached]", lambda: dashboard.load_csv("news_feed.csv"), repeat=20,
+                       items=scale["headlines"], unit="rows")
+    return [cold, warm]
+
+
+def bench_backtest(scale, tmp):
+    """
+    Moving-average sweep over a synthetic close matrix, in-process and on the shared-memory pool.
+    """
+    import numpy as np
+    import pandas as pd
+    from analytics import backtest
+
+    names = list(synthetic.symbols(scale["symbols"]))
+    close = np.column_stack([synthetic.random_walk(scale["bars"], seed=i) for i in range(len(names))])
+    inputs = (pd.RangeIndex(scale["bars"]), names, {"close": close})
+    grid = {"fast": list(range(5, 55, 5)), "slow": list(range(20, 110, 10))}
+    n = len(backtest.expand_grid("ma_cross", grid))
+    serial = measure("backtest.sweep[ma_cross,1 worker]",
+                     lambda: backtest.sweep("ma_cross", names, grid=grid, workers=1, inputs=inputs),
+                     repeat=1, items=n, unit="combinations", symbols=len(names))
+    pooled = measure("backtest.sweep[ma_cross,pool]",
+                     lambda: backtest.sweep("ma_cross", names, grid=grid, workers=os.cpu_count(), inputs=inputs),
+                     repeat=1, items=n, unit="combinations", symbols=len(names), workers=os.cpu_count())
+    return [serial, pooled]
+
+
+BENCHMARKS = {
+    "realtime": bench_realtime,
+    "tick_store": bench_tick_store,
+    "historical": bench_historical,
+    "sentiment": bench_sentiment,
+    "embeddings": bench_embeddings,
+    "pdf": bench_pdf,
+    "dashboard": bench_dashboard,
+    "backtest": bench_backtest,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline hot-path benchmarks")
+    parser.add_argument("--scale", choices=sorted(synthetic.SCALES), default="small")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    scale = synthetic.SCALES[args.scale]
+    results = []
+    started = time.perf_counter()
+    for name in args.only or BENCHMARKS:
+        print(f"[~] {name}...", flush=True)
+        with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as tmp:
+            try:
+                results.extend(BENCHMARKS[name](scale, tmp))
+            except Exception as e:
+                print(f"[!] {name} failed: {type(e).__name__}: {e}")
+                results.append({"name": name, "error": f"{type(e).__name__}: {e}"})
+
+    write_report(results, args.out, scale=args.scale, sizes=scale, seconds=round(time.perf_counter() - started, 1))
+    if args.out:
+        print(f"[✓] Wrote {len(results)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
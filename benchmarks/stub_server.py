@@ -0,0 +1,75 @@
+# benchmarks/stub_server.py
+#
+# Local stand-in for the NSE quote API and the historical API, so network-bound
+# hot paths can be timed offline and repeatably.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import synthetic
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real hosts
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        symbol = query.get("symbol", "SYM0001").upper()
+        server = self.server
+
+        if parts.path.startswith("/api/quote-equity"):
+            body = synthetic.nse_quote_payload(symbol, 1000.0 + sum(map(ord, symbol)) % 500, server.names.get(symbol))
+        elif parts.path.startswith("/historical"):
+            body = server.history_cache.get(symbol)
+            if body is None:
+                body = server.history_cache[symbol] = synthetic.history_payload(symbol, server.bars)
+        else:
+            self.send_error(404)
+            return
+
+        if server.latency:
+            threading.Event().wait(server.latency)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """
+    Threaded HTTP server on 127.0.0.1 serving /api/quote-equity?symbol= and /historical/?symbol=.
+
+        with StubServer(bars=2500, latency=0.005) as stub:
+            requests.get(stub.url + "/api/quote-equity?symbol=TCS")
+    """
+
+    def __init__(self, names=None, bars=500, latency=0.0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.names = names or {}
+        self._server.bars = bars
+        self._server.latency = latency
+        self._server.history_cache = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
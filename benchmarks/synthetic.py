@@ -0,0 +1,148 @@
+# benchmarks/synthetic.py
+#
+# Deterministic synthetic market data for the benchmarks: quotes/ticks, NSE-shaped
+# historical payloads, headlines and PDFs, at any scale.
+
+import numpy as np
+import pandas as pd
+
+# Scale presets used by benchmarks.run_all
+SCALES = {
+    "small": {"symbols": 10, "ticks": 1_000, "bars": 500, "headlines": 2_000, "pages": 5, "passages": 500, "queries": 50},
+    "medium": {"symbols": 50, "ticks": 10_000, "bars": 2_500, "headlines": 20_000, "pages": 25, "passages": 5_000, "queries": 200},
+    "large": {"symbols": 200, "ticks": 100_000, "bars": 5_000, "headlines": 200_000, "pages": 100, "passages": 50_000, "queries": 1_000},
+}
+
+_WORDS = ("shares", "profit", "deal", "quarter", "growth", "merger", "order", "revenue", "margin", "outlook",
+          "acquires", "stake", "board", "dividend", "expansion", "contract", "guidance", "record", "slump", "rally")
+_VERBS = ("surges", "falls", "beats estimates", "misses estimates", "signs", "announces", "wins", "cuts", "raises", "eyes")
+_SOURCES = ("Economic Times - Tech", "LiveMint - Companies", "Business Standard - Deals", "MoneyControl - Market News")
+
+
+def symbols(n):
+    """
+    'n' ticker-like symbols with company names: {"SYM0001": "Synthetic Company 1 Limited", ...}
+    """
+    return {f"SYM{i:04d}": f"Synthetic Company {i} Limited" for i in range(1, n + 1)}
+
+
+def random_walk(n, start=1000.0, vol=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, vol, n)))
+
+
+def quote(symbol, price, company=None, volume=0, timestamp=None):
+    """
+    One quote dict shaped like get_realtime_data's output.
+    """
+    return {
+        "symbol": symbol,
+        "companyName": company,
+        "lastPrice": round(float(price), 2),
+        "change": round(float(price) * 0.001, 2),
+        "pChange": 0.1,
+        "dayHigh": round(float(price) * 1.01, 2),
+        "dayLow": round(float(price) * 0.99, 2),
+        "totalTradedVolume": int(volume),
+        "timestamp": timestamp,
+    }
+
+
+def nse_quote_payload(symbol, price, company=None):
+    """
+    NSE quote-equity JSON (the subset get_realtime_data reads).
+    """
+    return {
+        "metadata": {"symbol": symbol, "companyName": company or symbol},
+        "priceInfo": {
+            "lastPrice": round(float(price), 2),
+            "change": round(float(price) * 0.001, 2),
+            "pChange": 0.1,
+            "intraDayHighLow": {"max": round(float(price) * 1.01, 2), "min": round(float(price) * 0.99, 2)},
+            "totalTradedVolume": 123456,
+        },
+    }
+
+
+def ticks(names, n_per_symbol, start="2025-01-01 03:45", step="1s", seed=0):
+    """
+    Quote batches in time order: one list of quotes per timestamp, covering every symbol.
+    """
+    times = pd.date_range(start, periods=n_per_symbol, freq=step, tz="UTC").asi8
+    prices = {s: random_walk(n_per_symbol, seed=seed + i) for i, s in enumerate(names)}
+    return [[quote(s, prices[s][t], names[s], volume=t * 100, timestamp=int(times[t])) for s in names]
+            for t in range(n_per_symbol)]
+
+
+def history_payload(symbol, n_bars, chunk=250, seed=0):
+    """
+    Historical API response body: {"data": [{"data": [CH_* bars], "meta": {...}}, ...]} in date chunks.
+    """
+    dates = pd.bdate_range(end="2025-01-01", periods=n_bars)
+    close = random_walk(n_bars, seed=seed)
+    rng = np.random.default_rng(seed)
+    bars = [{
+        "CH_SYMBOL": symbol,
+        "CH_TIMESTAMP": d.strftime("%Y-%m-%d"),
+        "CH_OPENING_PRICE": round(c * 0.995, 2),
+        "CH_TRADE_HIGH_PRICE": round(c * 1.01, 2),
+        "CH_TRADE_LOW_PRICE": round(c * 0.99, 2),
+        "CH_CLOSING_PRICE": round(c, 2),
+        "CH_LAST_TRADED_PRICE": round(c, 2),
+        "CH_PREVIOUS_CLS_PRICE": round(c * 0.999, 2),
+        "VWAP": round(c, 2),
+        "CH_TOT_TRADED_QTY": int(v),
+        "CH_TOTAL_TRADES": int(v // 50),
+        "CH_TOT_TRADED_VAL": float(v * c),
+    } for d, c, v in zip(dates, close, rng.integers(10_000, 5_000_000, n_bars))]
+    return {"data": [{"data": bars[i:i + chunk], "meta": {"symbol": symbol}} for i in range(0, n_bars, chunk)]}
+
+
+def headlines(n, names=None, seed=0):
+    """
+    A news_feed.csv-shaped frame (title, source, url, published) of 'n' unique headlines.
+    """
+    rng = np.random.default_rng(seed)
+    subjects = list((names or symbols(20)).values())
+    published = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 30 * 24 * 3600, n), unit="s")
+    titles = [
+        f"{subjects[rng.integers(len(subjects))]} {_VERBS[rng.integers(len(_VERBS))]} "
+        + " ".join(_WORDS[j] for j in rng.integers(0, len(_WORDS), 5)) + f" #{i}"
+        for i in range(n)
+    ]
+    return pd.DataFrame({
+        "title": titles,
+        "source": [_SOURCES[j] for j in rng.integers(0, len(_SOURCES), n)],
+        "url": [f"https://news.example.com/article/{i}" for i in range(n)],
+        "published": [p.isoformat() for p in published],
+    })
+
+
+def report_text(n_paragraphs, seed=0):
+    """
+    Filing-like prose: 'n_paragraphs' paragraphs of ~80 words each.
+    """
+    rng = np.random.default_rng(seed)
+    paragraphs = []
+    for p in range(n_paragraphs):
+        sentences = [
+            "The company " + " ".join(_WORDS[j] for j in rng.integers(0, len(_WORDS), 12)) + "."
+            for _ in range(6)
+        ]
+        paragraphs.append(f"Section {p + 1}. " + " ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def write_pdf(path, pages, paragraphs_per_page=4, seed=0):
+    """
+    Write a text PDF of 'pages' pages with PyMuPDF (already a dependency of the summarizer).
+    """
+    import fitz
+
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), report_text(paragraphs_per_page, seed=seed + page_no), fontsize=9)
+    doc.save(path)
+    doc.close()
+    return path
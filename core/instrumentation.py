@@ -0,0 +1,250 @@
+# core/instrumentation.py
+
+import cProfile
+import contextlib
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Latest durations kept per timer for percentiles; counts and totals cover every call
+SAMPLE_WINDOW = 512
+
+
+def _percentile(sorted_values, q):
+    # Nearest-rank on the recent window; keeps this module free of heavy imports
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """
+    Process-wide counters and timers.
+
+    Timers keep call count, total/max seconds, errors and a window of recent durations
+    (for p50/p99); counters are plain sums such as bytes fetched. Both are keyed by
+    name plus labels, e.g. ("http.request", host="www.nseindia.com").
+    """
+
+    def __init__(self):
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, error=False, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = {"count": 0, "errors": 0, "total": 0.0, "max": 0.0,
+                                             "recent": deque(maxlen=SAMPLE_WINDOW)}
+            timer["count"] += 1
+            timer["errors"] += bool(error)
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+            timer["recent"].append(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {"timers": [{name, labels, count, errors, total, mean, p50, p99, max}],
+                   "counters": [{name, labels, value}]}
+        """
+        with self._lock:
+            timers = [(k, dict(v, recent=list(v["recent"]))) for k, v in self._timers.items()]
+            counters = list(self._counters.items())
+
+        out = {"timers": [], "counters": []}
+        for (name, labels), t in sorted(timers):
+            recent = sorted(t["recent"])
+            out["timers"].append({
+                "name": name,
+                "labels": dict(labels),
+                "count": t["count"],
+                "errors": t["errors"],
+                "total": round(t["total"], 6),
+                "mean": round(t["total"] / t["count"], 6),
+                "p50": round(_percentile(recent, 50), 6),
+                "p99": round(_percentile(recent, 99), 6),
+                "max": round(t["max"], 6),
+            })
+        for (name, labels), value in sorted(counters):
+            out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+        return out
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix="rag_portal"):
+        """
+        Prometheus text exposition: timers as summaries (count/sum + 0.5/0.99 quantiles), counters as counters.
+        """
+        def fmt(labels, **extra):
+            pairs = {**labels, **extra}
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs.items()) + "}"
+
+        lines, seen = [], set()
+        snap = self.snapshot()
+        for t in snap["timers"]:
+            metric = f"{prefix}_{t['name'].replace('.', '_')}_seconds"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} summary")
+                seen.add(metric)
+            lines.append(f"{metric}{fmt(t['labels'], quantile='0.5')} {t['p50']}")
+            lines.append(f"{metric}{fmt(t['labels'], quantile='0.99')} {t['p99']}")
+            lines.append(f"{metric}_sum{fmt(t['labels'])} {t['total']}")
+            lines.append(f"{metric}_count{fmt(t['labels'])} {t['count']}")
+        for t in snap["timers"]:
+            metric = f"{prefix}_{t['name'].replace('.', '_')}_errors_total"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{fmt(t['labels'])} {t['errors']}")
+        for c in snap["counters"]:
+            metric = f"{prefix}_{c['name'].replace('.', '_')}_total"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{fmt(c['labels'])} {c['value']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextlib.contextmanager
+def span(name, **labels):
+    """
+    Time a block:  with span("model.inference", model="bart"): ...
+    """
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        metrics.observe(name, time.perf_counter() - started, error=error, **labels)
+
+
+def timed(name=None, **labels):
+    """
+    Decorator form of span(); the timer defaults to <module>.<function>.
+
+        @timed
+        def fetch_news(): ...
+
+        @timed("model.inference", model="finbert")
+        def _score_finbert(texts): ...
+    """
+    def decorator(fn):
+        timer = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(timer, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        fn, name = name, None
+        return decorator(fn)
+    return decorator
+
+
+def count(name, value=1, **labels):
+    metrics.inc(name, value, **labels)
+
+
+# ------------------- Profiling ------------------- #
+class SamplingProfiler:
+    """
+    Low-overhead sampler: a daemon thread records the innermost frames of one target
+    thread every 'interval' seconds. Good for "where is this request spending time"
+    without cProfile's per-call overhead.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, depth=3):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.depth = depth
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.depth:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.samples[" <- ".join(stack)] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def report(self, top=25):
+        total = sum(self.samples.values()) or 1
+        lines = [f"{n:>6} {100 * n / total:5.1f}%  {stack}" for stack, n in self.samples.most_common(top)]
+        return f"{total} samples every {self.interval * 1000:.0f} ms\n" + "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profiled(mode="cprofile", top=25):
+    """
+    Profile one block (e.g. a single Streamlit run). Yields a dict whose "report" holds
+    the text report once the block exits. 'mode' is "cprofile", "sampling" or None (off).
+    """
+    result = {"mode": mode, "report": None}
+    if mode is None:
+        yield result
+        return
+
+    if mode == "sampling":
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result["report"] = profiler.report(top)
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        result["report"] = out.getvalue()
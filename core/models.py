@@ -0,0 +1,136 @@
+# core/models.py
+
+import functools
+import importlib
+import inspect
+import os
+import resource
+import threading
+import time
+
+# Friendly names -> "module:loader" for every heavy model in the app. Nothing is
+# imported until a model is first requested or explicitly warmed.
+MODEL_LOADERS = {
+    "embeddings": "rag.embeddings:load_encoder",
+    "qa": "rag.query_handler:load_qa_model",
+    "summarizer": "ingestion.pdf_summarizer:load_summarizer",
+    "sentiment": "ingestion.sentiment:load_analyzer",
+}
+
+
+def resident_memory_mb():
+    """
+    Current resident set size of this process in MB (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        # ru_maxrss is KB on Linux, bytes on macOS; either way it is a peak, not current
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ModelRegistry:
+    """
+    Process-wide store of loaded models.
+
+    Each (name, args) combination is loaded at most once, even when several threads
+    ask for it at the same time, and its load time and resident-memory growth are
+    recorded for report().
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+        self.marks = {}
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_or_load(self, key, loader):
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock_for(key):
+            if key not in self._models:
+                rss_before = resident_memory_mb()
+                started = time.perf_counter()
+                self._models[key] = loader()
+                self._stats[key] = {
+                    "load_seconds": round(time.perf_counter() - started, 3),
+                    "rss_mb": round(resident_memory_mb() - rss_before, 1),
+                    "loaded_at": time.time(),
+                }
+                print(f"[✓] Loaded model {key[0]} in {self._stats[key]['load_seconds']}s "
+                      f"(+{self._stats[key]['rss_mb']} MB)")
+            return self._models[key]
+
+    def is_loaded(self, name):
+        return any(key[0] == name for key in self._models)
+
+    def warm(self, names=None, background=True):
+        """
+        Load models ahead of first use, by default on a daemon thread so rendering isn't blocked.
+        """
+        names = list(MODEL_LOADERS) if names is None else list(names)
+
+        def _load_all():
+            for name in names:
+                module_name, func_name = MODEL_LOADERS[name].split(":")
+                try:
+                    getattr(importlib.import_module(module_name), func_name)()
+                except Exception as e:
+                    print(f"[!] Failed to warm model {name}: {e}")
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def mark(self, label, seconds):
+        """
+        Record a one-off timing such as time-to-first-render (first value wins).
+        Returns True if this call stored the value.
+        """
+        if label in self.marks:
+            return False
+        self.marks[label] = round(seconds, 3)
+        return True
+
+    def report(self):
+        """
+        Returns:
+            dict: {"models": {name: stats}, "marks": {...}, "rss_mb": current process RSS}
+        """
+        models = {}
+        for (name, arguments), stats in self._stats.items():
+            label = name + (f"({', '.join(f'{k}={v}' for k, v in arguments)})" if arguments else "")
+            models[label] = dict(stats)
+        return {"models": models, "marks": dict(self.marks), "rss_mb": round(resident_memory_mb(), 1)}
+
+
+registry = ModelRegistry()
+
+
+def lazy_model(name):
+    """
+    Decorator for model loaders: the loader runs on first call (per distinct arguments)
+    and every later call returns the same shared instance from the registry.
+    """
+    def decorator(loader):
+        signature = inspect.signature(loader)
+
+        @functools.wraps(loader)
+        def get(*args, **kwargs):
+            # Key on the fully bound arguments so get() and get(<defaults>) share one instance
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, tuple(bound.arguments.items()))
+            return registry.get_or_load(key, lambda: loader(*bound.args, **bound.kwargs))
+        return get
+    return decorator
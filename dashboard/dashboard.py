@@ -1,74 +1,259 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import glob
 import os
+import sys
+import time
 
-DATA_PATH = "data/"  # Path to store CSV files (exported from modules)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# `streamlit run dashboard/dashboard.py` puts only this folder on the path
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.instrumentation import timed
+from dashboard.downsample import MAX_POINTS_PER_SERIES, downsample_frame
+from ingestion.tick_store import TICK_DTYPE, TickStore
+
+DATA_PATH = os.path.join(PROJECT_ROOT, "data")
+
+# How often the live tab polls the tick store (seconds)
+LIVE_REFRESH_SECONDS = 5
+# Ticks a live tail keeps in session state; older ones are dropped
+MAX_TAIL_TICKS = 50_000
 
 # ------------------- Load Data Functions ------------------- #
+@st.cache_data(show_spinner=False, max_entries=64)
+def _read_csv_at(file_path, mtime):
+    return pd.read_csv(file_path)
+
+@timed
 def load_csv(file_name):
+    """
+    Parsed CSV from data/, re-read only when the file's mtime changes.
+    """
     file_path = os.path.join(DATA_PATH, file_name)
     if os.path.exists(file_path):
-        return pd.read_csv(file_path)
+        return _read_csv_at(file_path, os.path.getmtime(file_path))
     else:
         st.warning(f"{file_name} not found.")
         return pd.DataFrame()
 
+def historical_symbols():
+    return sorted({os.path.basename(p).split("_")[0].upper() for p in glob.glob(os.path.join(DATA_PATH, "*_historical*"))})
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _historical_at(symbol, mtime):
+    from ingestion.historical import load_historical
+    return load_historical(symbol)
+
+@timed
+def load_historical_cached(symbol):
+    # Stored files are upper-cased like ohlcv_path; a symbol with nothing stored yet gets mtime 0
+    symbol = symbol.upper()
+    paths = glob.glob(os.path.join(DATA_PATH, f"{symbol}_historical*"))
+    return _historical_at(symbol, max((os.path.getmtime(p) for p in paths), default=0))
+
+# ------------------- Live Tick Tail ------------------- #
+class TickTail:
+    """
+    Follows one symbol's tick partition, reading only the bytes appended since the
+    previous poll and rolling over to the next day's partition when it appears.
+    Holds the current session only, capped at MAX_TAIL_TICKS.
+    """
+
+    def __init__(self, symbol, store=None):
+        self.store = store or TickStore()
+        self.symbol = symbol.upper()
+        self.date = None
+        self.offset = 0
+        self.records = np.empty(0, dtype=TICK_DTYPE)
+
+    @timed("dashboard.TickTail.poll")
+    def poll(self):
+        """
+        Returns:
+            int: number of new ticks picked up.
+        """
+        dates = [d for d in self.store.dates(start=self.date) if os.path.exists(self.store.partition_path(d, self.symbol))]
+        if not dates:
+            return 0
+        if self.date is None:
+            # Start from the most recent day rather than the whole archive
+            dates = dates[-1:]
+
+        added = 0
+        for date in dates:
+            if date != self.date:
+                # New session: drop the previous day's ticks
+                self.date, self.offset = date, 0
+                self.records = self.records[:0]
+            path = self.store.partition_path(date, self.symbol)
+            count = (os.path.getsize(path) - self.offset) // TICK_DTYPE.itemsize
+            if count <= 0:
+                continue
+            new = np.fromfile(path, dtype=TICK_DTYPE, count=count, offset=self.offset)
+            self.offset += count * TICK_DTYPE.itemsize
+            self.records = np.concatenate([self.records, new])[-MAX_TAIL_TICKS:]
+            added += count
+        return added
+
+    def frame(self, last=None):
+        records = self.records if last is None else self.records[-last:]
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(records["timestamp"], unit="ns", utc=True),
+            "lastPrice": records["lastPrice"],
+            "dayHigh": records["dayHigh"],
+            "dayLow": records["dayLow"],
+        })
+
+def _tail_for(symbol):
+    tails = st.session_state.setdefault("tick_tails", {})
+    if symbol not in tails:
+        tails[symbol] = TickTail(symbol)
+    return tails[symbol]
+
+def _price_rows(frame):
+    return frame.set_index("timestamp")[["lastPrice"]]
+
+def stream_live_quotes(slot, symbol):
+    """
+    Draw the live chart into 'slot' once, then every LIVE_REFRESH_SECONDS append only
+    the ticks polled since with add_rows instead of re-sending the whole tail.
+
+    Runs until Streamlit interrupts the script for a rerun (any widget change), so it is
+    called after every other tab has rendered. The chart is redrawn from the downsampled
+    tail only on a new session or once MAX_POINTS_PER_SERIES raw ticks have been appended,
+    which keeps the browser-side series bounded.
+    """
+    tail = _tail_for(symbol)
+    with slot.container():
+        metric_slot, chart_slot, caption_slot = st.empty(), st.empty(), st.empty()
+
+    chart, chart_date, appended = None, None, 0
+    while True:
+        added = tail.poll()
+        if not len(tail.records):
+            metric_slot.info(f"No ticks stored for {symbol} yet.")
+        else:
+            latest = tail.records[-1]
+            metric_slot.metric(symbol, f"{latest['lastPrice']:.2f}", f"{latest['change']:+.2f} ({latest['pChange']:+.2f}%)")
+            if chart is None or tail.date != chart_date or appended >= MAX_POINTS_PER_SERIES:
+                plotted = downsample_frame(tail.frame(), "timestamp", "lastPrice", MAX_POINTS_PER_SERIES)
+                chart = chart_slot.line_chart(_price_rows(plotted))
+                chart_date, appended = tail.date, 0
+            elif added:
+                new = min(added, len(tail.records))
+                chart.add_rows(_price_rows(tail.frame(last=new)))
+                appended += new
+            caption_slot.caption(f"{len(tail.records)} ticks ({added} new), {appended} appended since last redraw")
+        time.sleep(LIVE_REFRESH_SECONDS)
+
 # ------------------- Dashboard Layout ------------------- #
 def show_dashboard():
     st.set_page_config(page_title="RAG Analytics Dashboard", layout="wide")
     st.title("📊 Unified Analytics Dashboard")
 
     # Tabs layout
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 Real-Time Stock", "🕰️ Historical Data", "💱 FX Rates", "📑 Sentiment & News"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Real-Time Stock", "🕰️ Historical Data", "💱 FX Rates",
+                                            "📑 Sentiment & News", "🧮 Portfolio"])
 
     # 1. Real-Time Stock
+    live_ticker, live_slot = None, None
     with tab1:
         st.subheader("Live Stock Quotes")
-        rt_data = load_csv("real_time_stock.csv")
-        if not rt_data.empty:
-            selected_ticker = st.selectbox("Select Ticker", rt_data["Ticker"].unique())
-            filtered = rt_data[rt_data["Ticker"] == selected_ticker]
-            st.dataframe(filtered, use_container_width=True)
-            fig = px.line(filtered, x="Time", y="Price", title=f"{selected_ticker} Real-Time Movement")
-            st.plotly_chart(fig, use_container_width=True)
+        symbols = list(TickStore().symbols())
+        if symbols:
+            live_ticker = st.selectbox("Select Ticker", symbols)
+            # Filled by stream_live_quotes once the other tabs are drawn
+            live_slot = st.empty()
+        else:
+            st.warning("No real-time ticks stored yet.")
 
     # 2. Historical Data
     with tab2:
         st.subheader("Historical Stock Data")
-        hist_data = load_csv("historical_stock.csv")
-        if not hist_data.empty:
-            selected_ticker = st.selectbox("Select Historical Ticker", hist_data["Symbol"].unique())
-            hdata = hist_data[hist_data["Symbol"] == selected_ticker]
+        symbols = historical_symbols()
+        if symbols:
+            selected_ticker = st.selectbox("Select Historical Ticker", symbols)
+            hdata = load_historical_cached(selected_ticker).reset_index()
             st.dataframe(hdata.tail(30), use_container_width=True)
-            fig = px.line(hdata, x="Date", y="Close", title=f"{selected_ticker} - Closing Price")
+            chart = downsample_frame(hdata, "Date", "Close", MAX_POINTS_PER_SERIES)
+            fig = px.line(chart, x="Date", y="Close", title=f"{selected_ticker} - Closing Price")
             st.plotly_chart(fig, use_container_width=True)
 
     # 3. FX Rates
     with tab3:
         st.subheader("Live Currency Exchange Rates")
-        fx_data = load_csv("fx_rates.csv")
-        if not fx_data.empty:
-            st.dataframe(fx_data, use_container_width=True)
-            fig = px.bar(fx_data, x="Currency", y="Rate", color="Currency", title="Live FX Rates (INR)")
+        from ingestion.fx import CURRENCIES, get_currency_rates, load_fx_history
+        # Both are served from the FX module's TTL cache between fetches
+        rates = get_currency_rates()
+        inr_rates = rates[rates["Pair"].str.endswith("/INR")]
+        if not inr_rates.empty:
+            st.dataframe(rates, use_container_width=True)
+            fig = px.bar(inr_rates, x="Pair", y="Rate", color="Pair", title="Live FX Rates (INR)")
+            st.plotly_chart(fig, use_container_width=True)
+
+        fx_history = load_fx_history().reset_index()
+        if len(fx_history) > 1:
+            currency = st.selectbox("FX history", CURRENCIES)
+            chart = downsample_frame(fx_history, "Timestamp", currency, MAX_POINTS_PER_SERIES)
+            fig = px.line(chart, x="Timestamp", y=currency, title=f"{currency}/INR")
             st.plotly_chart(fig, use_container_width=True)
 
     # 4. Sentiment & News
     with tab4:
         st.subheader("Sentiment Analysis")
-        sent_data = load_csv("sentiment_results.csv")
-        news_data = load_csv("latest_news.csv")
+        sent_data = load_csv("news_sentiment.csv")
+        news_data = load_csv("news_feed.csv")
 
         if not sent_data.empty:
             st.write("### 🧠 Sentiment Summary")
             st.dataframe(sent_data, use_container_width=True)
-            fig = px.pie(sent_data, names='Sentiment', title="Sentiment Distribution")
+            fig = px.pie(sent_data, names="sentiment", title="Sentiment Distribution")
             st.plotly_chart(fig, use_container_width=True)
 
         if not news_data.empty:
             st.write("### 📰 Latest News Highlights")
-            for _, row in news_data.iterrows():
-                st.markdown(f"**{row['title']}**\\n\\n*{row['source']}*\\n\\n[Read more]({row['link']})")
+            latest_news = news_data.sort_values("published", ascending=False).head(20)
+            st.markdown("\n\n".join(
+                "**" + latest_news["title"] + "**\n\n*" + latest_news["source"] + "*\n\n[Read more](" + latest_news["url"] + ")"
+            ))
+
+    # 5. Portfolio
+    with tab5:
+        st.subheader("Portfolio & Cross-Section")
+        from analytics.portfolio import get_portfolio
+        # Refreshed incrementally per process; this run renders one immutable snapshot of it
+        portfolio = get_portfolio()
+        if portfolio.close.empty:
+            st.warning("No stored history yet.")
+        else:
+            horizon = st.select_slider("Movers over (bars)", options=[1, 5, 21, 63], value=1)
+            gainers, losers = portfolio.top_movers(n=10, bars=horizon)
+            col1, col2 = st.columns(2)
+            col1.write("### 🚀 Top Gainers")
+            col1.dataframe(gainers, use_container_width=True)
+            col2.write("### 🔻 Top Losers")
+            col2.dataframe(losers, use_container_width=True)
+
+            st.write("### 🏭 Sectors")
+            st.dataframe(portfolio.sector_summary(), use_container_width=True)
+
+            corr = portfolio.correlation()
+            fig = px.imshow(corr, zmin=-1, zmax=1, color_continuous_scale="RdBu",
+                            title=f"Return Correlation (last {portfolio.lookback} bars)")
+            st.plotly_chart(fig, use_container_width=True)
+
+            beta = portfolio.latest_beta().dropna().sort_values().rename("Beta").reset_index()
+            beta.columns = ["Symbol", "Beta"]
+            fig = px.bar(beta, x="Symbol", y="Beta",
+                         title=f"{portfolio.beta_window}-bar Beta vs {portfolio.benchmark_name}")
+            st.plotly_chart(fig, use_container_width=True)
+
+    if live_ticker:
+        stream_live_quotes(live_slot, live_ticker)
 
 if __name__ == "__main__":
     show_dashboard()
@@ -0,0 +1,54 @@
+# dashboard/downsample.py
+
+import numpy as np
+import pandas as pd
+
+# Upper bound on points sent to the browser for any one chart series
+MAX_POINTS_PER_SERIES = 2000
+
+
+def lttb(x, y, threshold=MAX_POINTS_PER_SERIES):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of 'threshold - 2' equal buckets in
+    between, the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, so peaks and troughs survive.
+
+    Returns:
+        np.ndarray: sorted indices of the points to keep.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        nlo, nhi = (bounds[i + 1], bounds[i + 2]) if i + 2 < len(bounds) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_frame(df, x, y, threshold=MAX_POINTS_PER_SERIES):
+    """
+    Rows of 'df' kept by LTTB on columns (x, y); rows with a missing y are dropped first.
+    """
+    df = df[df[y].notna()]
+    if len(df) <= threshold:
+        return df
+    xs = df[x]
+    if pd.api.types.is_datetime64_any_dtype(xs):
+        xs = xs.astype("int64")
+    return df.iloc[lttb(xs.to_numpy(), df[y].to_numpy(), threshold)]
@@ -0,0 +1,289 @@
+# ingestion/entities.py
+
+import glob
+import hashlib
+import os
+import re
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from ingestion.tick_store import TickStore
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+NEWS_CSV = os.path.join(DATA_DIR, "news_feed.csv")
+# Append-only postings: one (article_id, symbol, published) row per mention
+POSTINGS_CSV = os.path.join(DATA_DIR, "news_symbols.csv")
+
+# Legal-form suffixes dropped to derive a short alias from a company name
+_NAME_SUFFIXES = re.compile(r"[\s,.]+(limited|ltd\.?|ltd|inc\.?|corporation|corp\.?|co\.?)$", re.I)
+# Tickers shorter than this are too ambiguous to match on their own (e.g. "IT", "M")
+MIN_TICKER_LENGTH = 3
+
+
+def article_id(url):
+    """
+    Stable article id; the same SHA-1 of the URL the sentiment engine keys on.
+    """
+    return hashlib.sha1(str(url).encode("utf-8")).hexdigest()
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: one pass over the text finds every pattern occurrence,
+    whatever the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, value in patterns:
+            self._insert(pattern, value)
+        self._link()
+
+    def _insert(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter(self, text):
+        """
+        Yields:
+            tuple: (start, end, value) for every match, end exclusive.
+        """
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                yield i + 1 - length, i + 1, value
+
+
+class EntityLinker:
+    """
+    Links free text to NSE symbols by ticker or company name.
+
+    Company names match case-insensitively; tickers must appear upper-case in the
+    original text, so "TCS" is tagged but the word "infy" in a URL slug is not.
+    Matches must sit on word boundaries.
+    """
+
+    def __init__(self, names):
+        """
+        Args:
+            names (dict): {symbol: company name or None}
+        """
+        self.symbols = sorted(names)
+        patterns = []
+        for symbol, name in names.items():
+            if len(symbol) >= MIN_TICKER_LENGTH:
+                patterns.append((symbol.lower(), (symbol, True)))
+            for alias in self.aliases(name):
+                patterns.append((alias.lower(), (symbol, False)))
+        self._matcher = AhoCorasick(patterns)
+
+    @staticmethod
+    def aliases(name):
+        if not name:
+            return []
+        name = " ".join(str(name).split())
+        short = _NAME_SUFFIXES.sub("", name)
+        return [name] if short == name or len(short) < 4 else [name, short]
+
+    def find(self, text):
+        """
+        Symbols mentioned in 'text', in order of first mention.
+        """
+        text = "" if text is None or (isinstance(text, float) and np.isnan(text)) else str(text)
+        lowered = text.lower()
+        found = {}
+        for start, end, (symbol, is_ticker) in self._matcher.iter(lowered):
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            if end < len(lowered) and lowered[end].isalnum():
+                continue
+            if is_ticker and text[start:end] != symbol:
+                continue
+            found.setdefault(symbol, start)
+        return sorted(found, key=found.get)
+
+    def tag(self, texts):
+        return [self.find(t) for t in texts]
+
+
+def symbol_universe(store=None):
+    """
+    {symbol: company name} for everything we hold data for: the tick store (which
+    records companyName from get_realtime_data) plus stored histories.
+    """
+    store = store or TickStore()
+    names = dict(store.symbols())
+    for path in glob.glob(os.path.join(DATA_DIR, "*_historical*")):
+        names.setdefault(os.path.basename(path).split("_")[0].upper(), None)
+    return names
+
+
+_linker_lock = threading.Lock()
+_linker_cache = {}
+
+
+def get_linker(store=None):
+    """
+    Shared EntityLinker, rebuilt only when the symbol universe changes.
+    """
+    names = symbol_universe(store)
+    key = tuple(sorted((s, n or "") for s, n in names.items()))
+    with _linker_lock:
+        if _linker_cache.get("key") != key:
+            _linker_cache.update(key=key, linker=EntityLinker(names))
+        return _linker_cache["linker"]
+
+
+def _utc_ns(value):
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).value
+
+
+def _published_ns(published):
+    ts = pd.to_datetime(pd.Series(published, dtype="object"), errors="coerce", utc=True)
+    now = pd.Timestamp.now(tz="UTC")
+    # Undated articles count as published when they were ingested
+    return ts.fillna(now).astype("int64").to_numpy()
+
+
+class NewsEntityIndex:
+    """
+    Inverted index symbol -> (published ns, article id), kept sorted by time per symbol
+    so a time-window query is two binary searches.
+
+    Postings are persisted append-only to data/news_symbols.csv; the in-memory view is
+    reloaded when that file grows.
+    """
+
+    def __init__(self, path=POSTINGS_CSV, news_csv=NEWS_CSV):
+        self.path = path
+        self.news_csv = news_csv
+        self._postings = {}
+        self._loaded_size = -1
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size == self._loaded_size:
+            return
+        postings = {}
+        if size:
+            df = pd.read_csv(self.path, dtype={"article_id": str, "symbol": str, "published_ns": "int64"})
+            df = df.drop_duplicates(["article_id", "symbol"]).sort_values("published_ns", kind="stable")
+            for symbol, group in df.groupby("symbol", sort=False):
+                postings[symbol] = (group["published_ns"].to_numpy(), group["article_id"].to_numpy())
+        self._postings, self._loaded_size = postings, size
+
+    def _append(self, articles, linker=None):
+        df = pd.DataFrame(articles, columns=["title", "url", "published"])
+        rows = pd.DataFrame(columns=["article_id", "symbol", "published_ns"])
+        if not df.empty:
+            linker = linker or get_linker()
+            tagged = df.assign(symbol=linker.tag(df["title"]), article_id=[article_id(u) for u in df["url"]],
+                               published_ns=_published_ns(df["published"]))
+            rows = tagged.explode("symbol").dropna(subset=["symbol"])
+        with self._lock:
+            # Written even when empty, so the header marks the index as built
+            if not rows.empty or not os.path.exists(self.path):
+                rows[["article_id", "symbol", "published_ns"]].to_csv(
+                    self.path, mode="a", index=False, header=not os.path.exists(self.path))
+        return len(rows)
+
+    def _ensure_built(self, linker=None):
+        # Articles saved before the index existed are tagged on first use; any postings
+        # written twice by a concurrent first build are dropped by _refresh
+        if not os.path.exists(self.path) and os.path.exists(self.news_csv):
+            self._append(pd.read_csv(self.news_csv), linker=linker)
+
+    def add(self, articles, linker=None):
+        """
+        Tag article dicts/rows (title, url, published) and append their postings.
+        Returns the number of (article, symbol) postings written.
+        """
+        self._ensure_built(linker)
+        return self._append(articles, linker)
+
+    def rebuild(self, news_csv=None, linker=None):
+        """
+        Re-tag every stored article, e.g. after new symbols joined the universe.
+        """
+        news_csv = news_csv or self.news_csv
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._loaded_size = -1
+        if not os.path.exists(news_csv):
+            return 0
+        return self._append(pd.read_csv(news_csv), linker=linker)
+
+    def lookup(self, symbol, since=None, until=None):
+        """
+        Article ids mentioning 'symbol' published in [since, until], newest first.
+        """
+        self._ensure_built()
+        with self._lock:
+            self._refresh()
+            times, ids = self._postings.get(symbol.upper(), (np.empty(0, dtype=np.int64), np.empty(0, dtype=object)))
+        lo = np.searchsorted(times, _utc_ns(since), "left") if since is not None else 0
+        hi = np.searchsorted(times, _utc_ns(until), "right") if until is not None else len(times)
+        return list(ids[lo:hi][::-1])
+
+    def recent(self, symbol, hours=24):
+        return self.lookup(symbol, since=pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours))
+
+    def counts(self):
+        self._ensure_built()
+        with self._lock:
+            self._refresh()
+            return {symbol: len(times) for symbol, (times, _) in self._postings.items()}
+
+
+news_index = NewsEntityIndex()
+
+
+def news_for(symbol, hours=24, news_csv=NEWS_CSV):
+    """
+    Stored articles mentioning 'symbol' in the last 'hours', newest first.
+    """
+    ids = news_index.recent(symbol, hours)
+    if not ids or not os.path.exists(news_csv):
+        return pd.DataFrame(columns=["title", "source", "url", "published"])
+    df = pd.read_csv(news_csv)
+    df.index = [article_id(u) for u in df["url"]]
+    df = df[~df.index.duplicated()]
+    return df.reindex([i for i in ids if i in df.index])
+
+
+if __name__ == "__main__":
+    print(f"Indexed {news_index.rebuild()} symbol mentions.")
+    print(news_index.counts())
@@ -1,38 +1,220 @@
 # ingestion/fx.py
 
-import requests
-import pandas as pd
 import os
-from datetime import datetime
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import permutations
 
-def fetch_live_fx_rates():
-    base_currencies = ['usd', 'eur', 'jpy', 'chf']
-    results = {}
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-    for base in base_currencies:
-        url = f"https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies/{base}.json"
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            inr_value = data.get(base, {}).get('inr')
-            results[f"{base.upper()}/INR"] = inr_value
-        except Exception as e:
-            results[f"{base.upper()}/INR"] = None
-            print(f"[✗] Error fetching {base.upper()}/INR: {e}")
-
-    # Convert to DataFrame
-    df = pd.DataFrame([results])
-    df.insert(0, 'Timestamp', timestamp)
-
-    # Save to CSV
-    os.makedirs("data", exist_ok=True)
-    output_path = "data/fx_rates.csv"
-    df.to_csv(output_path, index=False)
-
-    print("[✓] FX Rates Fetched and Saved to data/fx_rates.csv")
+import numpy as np
+import pandas as pd
+from core.cache import TTLCache
+from core.instrumentation import timed
+from ingestion.http_client import client
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+FX_DIR = os.path.join(DATA_DIR, "fx")
+FX_HISTORY_PATH = os.path.join(FX_DIR, "inr_rates.bin")
+LEGACY_CSV = os.path.join(DATA_DIR, "fx_rates.csv")
+
+# One INR-denominated JSON carries every currency; mirrors of the same file are raced
+FX_MIRRORS = (
+    "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies/inr.json",
+    "https://latest.currency-api.pages.dev/v1/currencies/inr.json",
+)
+FX_TIMEOUT = (3.05, 5)
+
+# Currencies tracked against INR; every cross between them is derived from these legs
+CURRENCIES = ("USD", "EUR", "JPY", "CHF", "GBP")
+
+# One fixed-width record per fetch: epoch-ns timestamp plus <CCY>/INR for each currency
+FX_DTYPE = np.dtype([("timestamp", "<i8")] + [(c, "<f8") for c in CURRENCIES])
+
+# Fresh rates are reused for this long before going back to the network
+FX_CACHE_TTL = 15 * 60
+
+_cache = TTLCache(maxsize=16, ttl=FX_CACHE_TTL)
+_write_lock = threading.Lock()
+
+
+# ------------------- Fetch ------------------- #
+def _fetch_mirror(url):
+    # Every fetch is appended to the history stamped "now", so it must be a fresh table;
+    # latest_rates() already serves recent history instead of refetching
+    response = client.get(url, timeout=FX_TIMEOUT, cache=False)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_inr_table():
+    """
+    Request the INR currency table from every mirror at once and keep the first good answer.
+
+    Returns:
+        dict: {currency code (lower case): units per 1 INR}
+    """
+    errors = []
+    executor = ThreadPoolExecutor(max_workers=len(FX_MIRRORS), thread_name_prefix="fx")
+    try:
+        pending = {executor.submit(_fetch_mirror, url) for url in FX_MIRRORS}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()["inr"]
+                except Exception as e:
+                    errors.append(e)
+    finally:
+        # Return with the winner; don't wait for the slower mirror to answer or time out
+        executor.shutdown(wait=False, cancel_futures=True)
+    raise ConnectionError(f"All FX mirrors failed: {errors}")
+
+def inr_legs(table, currencies=CURRENCIES):
+    """
+    <CCY>/INR for each currency from an INR table (which quotes CCY per INR).
+    """
+    return {c: (1.0 / table[c.lower()]) if table.get(c.lower()) else np.nan for c in currencies}
+
+def cross_rates(legs):
+    """
+    Every pair among the legs' currencies and INR, e.g. {"USD/INR": .., "EUR/USD": .., "INR/JPY": ..}.
+    """
+    values = {"INR": 1.0, **legs}
+    return {f"{a}/{b}": values[a] / values[b] for a, b in permutations(values, 2)}
+
+# ------------------- Store ------------------- #
+def append_rates(legs, timestamp=None, path=FX_HISTORY_PATH):
+    """
+    Append one fetch to the history: a raw FX_DTYPE record, never rewritten.
+    """
+    ts = pd.Timestamp.now(tz="UTC") if timestamp is None else pd.Timestamp(timestamp)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts
+    record = np.array([(ts.value, *(legs.get(c, np.nan) for c in CURRENCIES))], dtype=FX_DTYPE)
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(record.tobytes())
+
+def import_legacy_csv(csv_path=LEGACY_CSV, path=FX_HISTORY_PATH):
+    """
+    One-off: move the old single-snapshot fx_rates.csv (Timestamp, <CCY>/INR...) into the store.
+    """
+    if not os.path.exists(csv_path) or os.path.exists(path):
+        return 0
+    df = pd.read_csv(csv_path, parse_dates=["Timestamp"])
+    records = np.empty(len(df), dtype=FX_DTYPE)
+    # The legacy file holds naive local (IST) times
+    records["timestamp"] = pd.to_datetime(df["Timestamp"]).dt.tz_localize("Asia/Kolkata").astype("int64")
+    for c in CURRENCIES:
+        records[c] = df[f"{c}/INR"] if f"{c}/INR" in df.columns else np.nan
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+    return len(df)
+
+@timed
+def load_fx_history(start=None, end=None, path=FX_HISTORY_PATH):
+    """
+    Stored <CCY>/INR legs as a UTC-indexed float frame, optionally limited to [start, end].
+    """
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    key = ("history", start, end, size)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    n = size // FX_DTYPE.itemsize
+    records = np.memmap(path, dtype=FX_DTYPE, mode="r", shape=(n,)) if n else np.empty(0, dtype=FX_DTYPE)
+    ts = records["timestamp"]
+    lo = np.searchsorted(ts, _utc(start).value, "left") if start is not None else 0
+    hi = np.searchsorted(ts, _utc(end).value, "right") if end is not None else n
+    chunk = np.array(records[lo:hi])
+    df = pd.DataFrame({c: chunk[c] for c in CURRENCIES},
+                      index=pd.DatetimeIndex(pd.to_datetime(chunk["timestamp"], unit="ns", utc=True), name="Timestamp"))
+    _cache.set(key, df)
     return df
 
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+# ------------------- Public API ------------------- #
+@timed
+def fetch_live_fx_rates():
+    """
+    Fetch current rates once, append them to the history and return the INR legs
+    as a one-row frame (Timestamp, USD/INR, EUR/INR, ...).
+    """
+    import_legacy_csv()
+    timestamp = pd.Timestamp.now(tz="UTC")
+    try:
+        legs = inr_legs(fetch_inr_table())
+    except Exception as e:
+        print(f"[✗] Error fetching FX rates: {e}")
+        return pd.DataFrame()
+
+    append_rates(legs, timestamp)
+    _cache.set("latest", (timestamp, legs))
+
+    print("[✓] FX Rates Fetched and appended to data/fx/inr_rates.bin")
+    return pd.DataFrame([{"Timestamp": timestamp, **{f"{c}/INR": v for c, v in legs.items()}}])
+
+def latest_rates(max_age=FX_CACHE_TTL):
+    """
+    Returns:
+        tuple: (timestamp, {<CCY>: <CCY>/INR}) from memory, the store, or a live fetch
+        when the newest stored rates are older than 'max_age' seconds.
+    """
+    cached = _cache.get("latest")
+    if cached is not None:
+        return cached
+
+    history = load_fx_history()
+    if len(history) and (pd.Timestamp.now(tz="UTC") - history.index[-1]).total_seconds() <= max_age:
+        latest = (history.index[-1], history.iloc[-1].to_dict())
+        _cache.set("latest", latest)
+        return latest
+
+    fetch_live_fx_rates()
+    history = load_fx_history()
+    return (history.index[-1], history.iloc[-1].to_dict()) if len(history) else (None, {})
+
+def get_currency_rates(max_age=FX_CACHE_TTL):
+    """
+    Latest rates for every currency pair, for display.
+
+    Returns:
+        pd.DataFrame: columns Pair, Rate, Timestamp.
+    """
+    timestamp, legs = latest_rates(max_age)
+    rates = cross_rates(legs)
+    return pd.DataFrame({"Pair": list(rates), "Rate": list(rates.values()), "Timestamp": timestamp})
+
+def to_inr(df, currency, columns, on=None):
+    """
+    Convert price columns quoted in 'currency' to INR using the last stored rate at or
+    before each row (as-of join), e.g. to_inr(bars, "USD", ["Open", "Close"]).
+
+    Args:
+        df (pd.DataFrame): rows with a datetime index, or a datetime column named by 'on'.
+        currency (str): quote currency of 'columns'.
+
+    Returns:
+        pd.DataFrame: 'df' with <column>_INR added for each column.
+    """
+    currency = currency.upper()
+    if currency == "INR":
+        return df.assign(**{f"{c}_INR": df[c] for c in columns})
+
+    history = load_fx_history()[[currency]].dropna().rename(columns={currency: "_fx"})
+    left = df.reset_index() if on is None else df.copy()
+    key = left.columns[0] if on is None else on
+    left["_asof"] = pd.to_datetime(left[key], utc=True)
+    left = left.sort_values("_asof", kind="stable")
+    merged = pd.merge_asof(left, history, left_on="_asof", right_index=True, direction="backward")
+    out = merged.assign(**{f"{c}_INR": merged[c] * merged["_fx"] for c in columns}).drop(columns=["_asof", "_fx"])
+    return out.set_index(key) if on is None else out
+
 if __name__ == "__main__":
     fetch_live_fx_rates()
+    print(get_currency_rates())
@@ -1,46 +1,243 @@
 import requests
 import pandas as pd
+import numpy as np
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from core.instrumentation import timed
+from ingestion.http_client import client
+from ingestion.rate_limiter import nse_limiter
 
-def fetch_historical_data(symbol: str, start_date: str = None) -> pd.DataFrame:
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+API_URL = "https://nse-data-api.onrender.com/historical/"
+
+# Stored history younger than this is served from disk without touching the API
+HISTORY_TTL_SECONDS = 6 * 60 * 60
+# The API host sleeps when idle, so allow a slow first read
+HISTORY_TIMEOUT = (5, 60)
+
+# One lock per symbol so concurrent syncs never interleave a read-merge-write
+_symbol_locks = {}
+_symbol_locks_guard = threading.Lock()
+
+# NSE CH_* payload fields -> normalized OHLCV columns and their storage dtypes
+OHLCV_FIELDS = {
+    "CH_OPENING_PRICE": ("Open", np.float32),
+    "CH_TRADE_HIGH_PRICE": ("High", np.float32),
+    "CH_TRADE_LOW_PRICE": ("Low", np.float32),
+    "CH_CLOSING_PRICE": ("Close", np.float32),
+    "CH_LAST_TRADED_PRICE": ("Last", np.float32),
+    "CH_PREVIOUS_CLS_PRICE": ("PrevClose", np.float32),
+    "VWAP": ("VWAP", np.float32),
+    "CH_TOT_TRADED_QTY": ("Volume", np.int64),
+    "CH_TOTAL_TRADES": ("Trades", np.int64),
+    "CH_TOT_TRADED_VAL": ("Value", np.float64),
+}
+OHLCV_COLUMNS = [name for name, _ in OHLCV_FIELDS.values()]
+
+def _flatten_bars(payload):
+    """
+    Yield individual CH_* bar records from an NSE historical payload.
+
+    The API returns a list of date-range chunks shaped like {"data": [...bars], "meta": {...}};
+    legacy CSVs hold the same chunks with 'data' serialized as a JSON string.
+    Plain lists of bars are passed through unchanged.
+    """
+    for item in payload:
+        bars = item.get("data") if isinstance(item, dict) and "CH_TIMESTAMP" not in item else None
+        if bars is None:
+            yield item
+            continue
+        if isinstance(bars, str):
+            bars = json.loads(bars)
+        yield from bars
+
+@timed
+def normalize_historical(payload) -> pd.DataFrame:
+    """
+    Flatten an NSE historical payload into a typed OHLCV frame.
+
+    Args:
+        payload (list): Chunks or bars as returned by the historical API.
+
+    Returns:
+        pd.DataFrame: float32 prices, int64 volume/trades, float64 traded value,
+        indexed by 'Date' (unique, ascending).
+    """
+    raw = pd.DataFrame.from_records(list(_flatten_bars(payload)))
+    if raw.empty or "CH_TIMESTAMP" not in raw.columns:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+    df = pd.DataFrame(index=pd.DatetimeIndex(pd.to_datetime(raw["CH_TIMESTAMP"]), name="Date"))
+    for field, (name, dtype) in OHLCV_FIELDS.items():
+        values = pd.to_numeric(raw[field], errors="coerce") if field in raw.columns else pd.Series(np.nan, index=raw.index)
+        if np.issubdtype(dtype, np.integer):
+            values = values.fillna(0)
+        df[name] = values.to_numpy().astype(dtype)
+
+    # Overlapping chunks repeat bars; keep the latest copy of each date
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df
+
+def ohlcv_path(symbol: str) -> str:
+    return os.path.join(DATA_DIR, f"{symbol.upper()}_historical.npz")
+
+def save_ohlcv(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a normalized OHLCV frame as an uncompressed column-per-array .npz file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = {name: df[name].to_numpy() for name in OHLCV_COLUMNS}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, Date=df.index.values.astype("datetime64[ns]").view("i8"), **columns)
+    os.replace(tmp_path, path)
+
+def load_ohlcv(path: str) -> pd.DataFrame:
+    """
+    Load a frame written by save_ohlcv; the arrays come back with their stored dtypes.
+    """
+    with np.load(path) as arrays:
+        index = pd.DatetimeIndex(arrays["Date"].view("datetime64[ns]"), name="Date")
+        return pd.DataFrame({name: arrays[name] for name in OHLCV_COLUMNS}, index=index)
+
+def read_legacy_csv(path: str) -> pd.DataFrame:
+    """
+    Normalize one of the old <SYMBOL>_historical_data.csv files (JSON bars in a 'data' cell).
+    """
+    return normalize_historical(pd.read_csv(path).to_dict("records"))
+
+def load_historical(symbol: str) -> pd.DataFrame:
+    """
+    Load stored history for 'symbol', converting a legacy CSV to .npz on first use.
+    """
+    path = ohlcv_path(symbol)
+    if os.path.exists(path):
+        return load_ohlcv(path)
+
+    legacy = os.path.join(DATA_DIR, f"{symbol.upper()}_historical_data.csv")
+    if os.path.exists(legacy):
+        df = read_legacy_csv(legacy)
+        save_ohlcv(df, path)
+        # Carry over the CSV's age so the converted file is not mistaken for a fresh sync
+        legacy_mtime = os.path.getmtime(legacy)
+        os.utime(path, (legacy_mtime, legacy_mtime))
+        return df
+
+    return normalize_historical([])
+
+def _symbol_lock(symbol: str) -> threading.Lock:
+    with _symbol_locks_guard:
+        return _symbol_locks.setdefault(symbol.upper(), threading.Lock())
+
+def _is_fresh(path: str, ttl_seconds: float) -> bool:
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl_seconds
+
+@timed
+def _fetch_bars(symbol: str, since=None) -> pd.DataFrame:
+    """
+    Download bars for 'symbol' newer than 'since' (a Timestamp) and normalize them.
+    The API may ignore the start_date hint, so older bars are also dropped client-side.
+    """
+    params = {"symbol": symbol}
+    if since is not None:
+        params["start_date"] = (since + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+    response = client.get(API_URL, params=params, limiter=nse_limiter, timeout=HISTORY_TIMEOUT)
+    response.raise_for_status()
+
+    df = normalize_historical(response.json().get("data", []))
+    if since is not None:
+        df = df[df.index > since]
+    return df
+
+def merge_bars(stored: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge freshly fetched bars into stored history, deduplicating on the bar date
+    (CH_TIMESTAMP) with the newer copy winning.
+    """
+    if stored.empty:
+        return new
+    if new.empty:
+        return stored
+    merged = pd.concat([stored, new])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+@timed
+def fetch_historical_data(symbol: str, start_date: str = None,
+                          ttl_seconds: float = HISTORY_TTL_SECONDS, force: bool = False) -> pd.DataFrame:
     """
     Fetch historical stock data for a given symbol from the custom NSE API,
-    save it as a CSV in the data folder, and return it as a DataFrame.
+    normalize it to a typed OHLCV frame, save it as .npz in the data folder,
+    and return it as a DataFrame.
+
+    History is cached on disk per symbol. Within 'ttl_seconds' of the last sync
+    the stored file is returned as-is; after that only bars newer than the last
+    stored date are requested and merged in.
 
     Args:
         symbol (str): Ticker symbol (e.g., "INFY", "TCS").
         start_date (str): Optional. Filter data from this date (YYYY-MM-DD).
+        ttl_seconds (float): Optional. How long a sync stays fresh.
+        force (bool): Optional. Ignore the TTL and check the API for new bars.
 
     Returns:
-        pd.DataFrame: Historical stock data.
+        pd.DataFrame: Normalized OHLCV data indexed by date.
     """
-    api_url = "https://nse-data-api.onrender.com/historical/"
-    params = {"symbol": symbol}
+    symbol = symbol.upper()
+    path = ohlcv_path(symbol)
 
-    try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()
+    with _symbol_lock(symbol):
+        stored = load_historical(symbol)
 
-        data = response.json().get("data", [])
-        df = pd.DataFrame(data)
+        if force or not _is_fresh(path, ttl_seconds):
+            try:
+                since = stored.index[-1] if not stored.empty else None
+                new = _fetch_bars(symbol, since)
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching data: {e}")
+                new = None
 
-        if not df.empty and 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
+            if new is not None:
+                if not new.empty:
+                    stored = merge_bars(stored, new)
+                    save_ohlcv(stored, path)
+                    print(f"[✓] {symbol}: {len(new)} new bars (through {stored.index[-1].date()})")
+                elif os.path.exists(path):
+                    # Nothing new; restart the TTL so repeat requests stay on disk
+                    os.utime(path)
 
-            if start_date:
-                start = pd.to_datetime(start_date)
-                df = df[df['date'] >= start]
+    if start_date and not stored.empty:
+        stored = stored[stored.index >= pd.to_datetime(start_date)]
+    return stored
 
-            df = df.sort_values("date").reset_index(drop=True)
+def get_historical_stock_data(symbol: str) -> pd.DataFrame:
+    """
+    Cached history for the dashboard's "Stock Data" page.
+    """
+    return fetch_historical_data(symbol)
 
-            # Ensure data directory exists
-            os.makedirs("data", exist_ok=True)
-            file_path = os.path.join("data", f"{symbol}_historical_data.csv")
-            df.to_csv(file_path, index=False)
+@timed
+def sync_universe(symbols, max_workers: int = 16, ttl_seconds: float = HISTORY_TTL_SECONDS, force: bool = False):
+    """
+    Refresh stored history for many symbols in parallel.
 
-        return df
+    Returns:
+        dict: symbol -> number of stored bars after the sync.
+    """
+    symbols = sorted({s.strip().upper() for s in symbols if s.strip()})
+    started = time.monotonic()
+
+    def _sync(symbol):
+        return symbol, len(fetch_historical_data(symbol, ttl_seconds=ttl_seconds, force=force))
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hist-sync") as executor:
+        results = dict(executor.map(_sync, symbols))
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
-        return pd.DataFrame()
+    print(f"[✓] Synced {len(results)} symbols in {time.monotonic() - started:.1f}s")
+    return results
@@ -0,0 +1,287 @@
+# ingestion/http_client.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from core.instrumentation import count, span
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+HTTP_FIXTURES_DIR = os.environ.get("HTTP_FIXTURES_DIR", os.path.join(DATA_DIR, "http_fixtures"))
+
+# live: normal traffic; record: live traffic also saved as fixtures; replay: fixtures only, no network
+HTTP_MODE = os.environ.get("HTTP_MODE", "live")
+
+# (connect, read) seconds, used whenever a caller does not pass its own
+DEFAULT_TIMEOUT = (3.05, 15)
+# Keep-alive connections kept per host
+POOL_MAXSIZE = 32
+
+NSE_HOST = "www.nseindia.com"
+NSE_HOME = "https://www.nseindia.com"
+# NSE's bot-protection cookies last a few hours; refresh well before that
+NSE_COOKIE_TTL = 30 * 60
+
+# Browser-like headers NSE insists on
+NSE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Referer": "https://www.nseindia.com/"
+}
+
+
+class ReplayMiss(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode when no fixture was recorded for a request.
+    """
+
+
+def _request_key(method, url):
+    return hashlib.sha256(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+
+def _write_entry(directory, key, response, **meta):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{key}.body"), "wb") as f:
+        f.write(response.content)
+    entry = {
+        "url": response.url,
+        "status": response.status_code,
+        "headers": dict(response.headers),
+        "fetched_at": time.time(),
+        **meta,
+    }
+    tmp_path = os.path.join(directory, f"{key}.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, f"{key}.json"))
+
+
+def _read_entry(directory, key):
+    """
+    Returns:
+        tuple: (metadata dict, body bytes), or (None, None) if there is no entry.
+    """
+    try:
+        with open(os.path.join(directory, f"{key}.json"), encoding="utf-8") as f:
+            entry = json.load(f)
+        with open(os.path.join(directory, f"{key}.body"), "rb") as f:
+            return entry, f.read()
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None, None
+
+
+def _to_response(entry, body):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = body
+    response.url = entry["url"]
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+def freshness_lifetime(headers, default=None):
+    """
+    Seconds a response may be served from cache: Cache-Control max-age, else Expires,
+    else 'default'. None means it must not be stored (no-store) or not be reused.
+    """
+    cache_control = {d.strip().split("=")[0].lower(): d.strip() for d in headers.get("Cache-Control", "").split(",") if d.strip()}
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    if "max-age" in cache_control:
+        try:
+            return max(0, int(cache_control["max-age"].split("=", 1)[1]))
+        except ValueError:
+            pass
+    if headers.get("Expires"):
+        try:
+            return max(0, parsedate_to_datetime(headers["Expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+    return default
+
+
+class HttpClient:
+    """
+    Shared HTTP access for every ingestion module.
+
+    - One pooled requests.Session per host, so keep-alive connections are reused across
+      modules and threads; transient 502/503/504s and connection errors are retried.
+    - A default timeout on every call.
+    - NSE cookies are fetched from the homepage on first use, refreshed every
+      NSE_COOKIE_TTL seconds, and once more on a 401/403.
+    - Optional on-disk response cache (cache=True) that honours Cache-Control/Expires
+      and revalidates stale entries with ETag/Last-Modified.
+    - Record/replay of responses as fixtures (HTTP_MODE=record|replay) for offline runs.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, fixtures_dir=HTTP_FIXTURES_DIR, mode=HTTP_MODE,
+                 pool_maxsize=POOL_MAXSIZE):
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"Unknown HTTP mode {mode!r}")
+        self.cache_dir = cache_dir
+        self.fixtures_dir = fixtures_dir
+        self.mode = mode
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._nse_lock = threading.Lock()
+        self._nse_refreshed = 0.0
+        self.stats = {"requests": 0, "cache_hits": 0, "revalidated": 0, "replayed": 0}
+
+    # ------------------- Sessions ------------------- #
+    def session_for(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                retry = Retry(total=2, connect=2, read=1, status=2, backoff_factor=0.3,
+                              status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"),
+                              respect_retry_after_header=True)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                if host == NSE_HOST:
+                    session.headers.update(NSE_HEADERS)
+                self._sessions[host] = session
+            return session
+
+    def refresh_nse_cookies(self, force=False):
+        """
+        Visit the NSE homepage to (re)issue its session cookies. Returns the cookie names set.
+        """
+        if self.mode == "replay":
+            return []
+        with self._nse_lock:
+            if not force and time.monotonic() - self._nse_refreshed < NSE_COOKIE_TTL:
+                return []
+            session = self.session_for(NSE_HOME)
+            try:
+                session.get(NSE_HOME, timeout=DEFAULT_TIMEOUT)
+                self._nse_refreshed = time.monotonic()
+                print("[✓] NSE cookies refreshed.")
+            except requests.exceptions.RequestException as e:
+                print(f"[!] Failed to refresh NSE cookies: {e}")
+            return list(session.cookies.get_dict())
+
+    # ------------------- Requests ------------------- #
+    def _send(self, session, method, url, limiter, **kwargs):
+        self.stats["requests"] += 1
+        host = urlsplit(url).netloc
+        with span("http.request", host=host):
+            if limiter is not None:
+                response = limiter.request(session, method, url, **kwargs)
+            else:
+                response = session.request(method, url, **kwargs)
+        count("http.bytes", len(response.content), host=host)
+        count("http.responses", host=host, status=response.status_code)
+        return response
+
+    def request(self, method, url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, limiter=None,
+                cache=False, cache_ttl=None, **kwargs):
+        """
+        Send one request through the host's pooled session.
+
+        Args:
+            limiter: Optional RateLimiter that paces (and 429-retries) the call.
+            cache (bool): Serve/store GET responses from the on-disk cache.
+            cache_ttl (float): Freshness to assume when the server gives none.
+
+        Returns:
+            requests.Response
+        """
+        full_url = requests.Request(method, url, params=params).prepare().url
+        key = _request_key(method, full_url)
+
+        if self.mode == "replay":
+            entry, body = _read_entry(self.fixtures_dir, key)
+            if entry is None:
+                raise ReplayMiss(f"No recorded fixture for {method} {full_url}")
+            self.stats["replayed"] += 1
+            return _to_response(entry, body)
+
+        headers = dict(headers or {})
+        use_cache = cache and method.upper() == "GET" and self.cache_dir
+        entry = body = None
+        if use_cache:
+            entry, body = _read_entry(self.cache_dir, key)
+            if entry is not None and entry.get("expires") is not None and time.time() < entry["expires"]:
+                self.stats["cache_hits"] += 1
+                count("http.cache_hits", host=urlsplit(full_url).netloc)
+                return _to_response(entry, body)
+            if entry is not None:
+                # Stale: ask the server whether our copy is still good
+                if entry["headers"].get("ETag"):
+                    headers.setdefault("If-None-Match", entry["headers"]["ETag"])
+                if entry["headers"].get("Last-Modified"):
+                    headers.setdefault("If-Modified-Since", entry["headers"]["Last-Modified"])
+
+        is_nse = urlsplit(full_url).netloc == NSE_HOST
+        if is_nse:
+            self.refresh_nse_cookies()
+        session = self.session_for(full_url)
+        response = self._send(session, method, full_url, limiter, headers=headers, timeout=timeout, **kwargs)
+        if is_nse and response.status_code in (401, 403):
+            self.refresh_nse_cookies(force=True)
+            response = self._send(session, method, full_url, limiter, headers=headers, timeout=timeout, **kwargs)
+
+        if use_cache and response.status_code == 304 and entry is not None:
+            self.stats["revalidated"] += 1
+            lifetime = freshness_lifetime(response.headers, cache_ttl) or 0
+            entry.update(expires=time.time() + lifetime, fetched_at=time.time())
+            _write_entry(self.cache_dir, key, _to_response(entry, body), expires=entry["expires"])
+            return _to_response(entry, body)
+
+        if use_cache and response.status_code == 200:
+            lifetime = freshness_lifetime(response.headers, cache_ttl)
+            if lifetime is not None:
+                _write_entry(self.cache_dir, key, response, expires=time.time() + lifetime)
+
+        if self.mode == "record":
+            _write_entry(self.fixtures_dir, key, response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    # ------------------- Async ------------------- #
+    async def aget(self, url, **kwargs):
+        """
+        Awaitable get(); runs on a worker thread over the same per-host pools.
+        """
+        return await asyncio.to_thread(self.get, url, **kwargs)
+
+    async def gather(self, urls, **kwargs):
+        """
+        Fetch many URLs concurrently. Failed requests come back as exceptions, in order.
+        """
+        return await asyncio.gather(*(self.aget(url, **kwargs) for url in urls), return_exceptions=True)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# One client, and therefore one set of connection pools, per process
+client = HttpClient()
@@ -1,7 +1,16 @@
 import feedparser
 import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
+import json
 import os
+import threading
+
+from core.instrumentation import span, timed
+from ingestion.entities import news_index
+from ingestion.http_client import client
 
 # Define project root relative to this file
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -10,6 +19,13 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 # Ensure top-level data folder exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
+CSV_PATH = os.path.join(DATA_DIR, "news_feed.csv")
+TXT_PATH = os.path.join(DATA_DIR, "news_feed.txt")
+# ETag / Last-Modified per feed URL, for conditional GETs
+FEED_STATE_PATH = os.path.join(DATA_DIR, "news_feed_state.json")
+# Append-only index of URL and title hashes already saved
+SEEN_INDEX_PATH = os.path.join(DATA_DIR, "news_seen.txt")
+
 # Define RSS feeds
 RSS_FEEDS = {
     "Economic Times - Tech": "https://economictimes.indiatimes.com/rss/tech/rssfeeds/13357270.cms",
@@ -18,49 +34,172 @@ RSS_FEEDS = {
     "MoneyControl - Market News": "https://www.moneycontrol.com/rss/MCtopnews.xml"
 }
 
-def fetch_news():
-    all_articles = []
+# Per-feed connect/read timeouts (seconds) and how many feeds are fetched at once
+FEED_TIMEOUT = (3.05, 10)
+MAX_CONCURRENT_FEEDS = 32
+
+_state_lock = threading.Lock()
+
+def _load_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_json(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
 
-    for source, url in RSS_FEEDS.items():
-        feed = feedparser.parse(url)
+def _parse_entries(source, feed):
+    articles = []
+    for entry in feed.entries:
+        title = entry.get("title", "").strip()
+        link = entry.get("link", "").strip()
+        published = entry.get("published", datetime.now().isoformat())
 
-        for entry in feed.entries:
-            title = entry.get("title", "").strip()
-            link = entry.get("link", "").strip()
-            published = entry.get("published", datetime.now().isoformat())
-            
-            try:
-                published_time = datetime(*entry.published_parsed[:6]).isoformat()
-            except:
-                published_time = published
+        try:
+            published_time = datetime(*entry.published_parsed[:6]).isoformat()
+        except:
+            published_time = published
 
-            article = {
-                "title": title,
-                "source": source,
-                "url": link,
-                "published": published_time
-            }
+        article = {
+            "title": title,
+            "source": source,
+            "url": link,
+            "published": published_time
+        }
 
-            all_articles.append(article)
+        articles.append(article)
+    return articles
+
+def _fetch_feed(source, url, validators, conditional):
+    """
+    Fetch one feed, sending its stored ETag/Last-Modified when 'conditional'.
+    Returns (articles, new validators); an unchanged feed (304) yields no articles.
+    """
+    headers = {"User-Agent": "Mozilla/5.0 (RAG Analytics Portal)"}
+    if conditional and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if conditional and validators.get("modified"):
+        headers["If-Modified-Since"] = validators["modified"]
+
+    try:
+        with span("news.feed", source=source):
+            response = client.get(url, headers=headers, timeout=FEED_TIMEOUT)
+        if response.status_code == 304:
+            return [], validators
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"[!] {source}: {e}")
+        return [], validators
+
+    feed = feedparser.parse(response.content)
+    fresh = {
+        "etag": response.headers.get("ETag"),
+        "modified": response.headers.get("Last-Modified"),
+    }
+    return _parse_entries(source, feed), fresh
+
+@timed
+def fetch_news(feeds=None, conditional=True):
+    """
+    Fetch all feeds concurrently. With 'conditional', feeds that have not changed since
+    the last run answer 304 and contribute nothing.
+    """
+    feeds = RSS_FEEDS if feeds is None else feeds
+    with _state_lock:
+        state = _load_json(FEED_STATE_PATH)
+
+    all_articles = []
+    workers = max(1, min(MAX_CONCURRENT_FEEDS, len(feeds)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rss") as executor:
+        futures = {
+            url: executor.submit(_fetch_feed, source, url, state.get(url, {}), conditional)
+            for source, url in feeds.items()
+        }
+        for url, future in futures.items():
+            articles, validators = future.result()
+            all_articles.extend(articles)
+            state[url] = validators
+
+    with _state_lock:
+        _save_json(FEED_STATE_PATH, state)
 
     return all_articles
 
+def _title_key(title):
+    return " ".join(str(title).lower().split())
+
+def _hash(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+def load_seen_index():
+    if not os.path.exists(SEEN_INDEX_PATH):
+        # First run against an existing feed: seed from it so stored headlines aren't re-saved
+        if not os.path.exists(CSV_PATH):
+            return set()
+        build_seen_index()
+    with open(SEEN_INDEX_PATH, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+@timed
 def save_news(articles):
-    df = pd.DataFrame(articles)
+    """
+    Append only articles whose URL and title have not been saved before.
+
+    Returns:
+        pd.DataFrame: the newly saved articles.
+    """
+    df = pd.DataFrame(articles, columns=["title", "source", "url", "published"])
     df = df.drop_duplicates(subset=["title", "url"])
+
+    seen = load_seen_index()
+    url_keys = df["url"].map(_hash)
+    title_keys = df["title"].map(lambda t: _hash(_title_key(t)))
+    df = df[~(url_keys.isin(seen) | title_keys.isin(seen))]
+    # The same story can arrive twice in one batch under different URLs
+    df = df[~df["title"].map(_title_key).duplicated()]
     df = df.sort_values("published", ascending=False)
 
-    # Save inside top-level 'data' directory
-    csv_path = os.path.join(DATA_DIR, "news_feed.csv")
-    txt_path = os.path.join(DATA_DIR, "news_feed.txt")
+    if not df.empty:
+        write_header = not os.path.exists(CSV_PATH)
+        df.to_csv(CSV_PATH, mode="a", index=False, header=write_header)
+
+        with open(TXT_PATH, "a", encoding="utf-8") as f:
+            f.write("".join(df["title"] + " (" + df["source"] + ")\n" + df["url"] + "\n\n"))
+
+        with open(SEEN_INDEX_PATH, "a", encoding="utf-8") as f:
+            f.write("".join(f"{k}\n" for k in pd.concat([url_keys[df.index], title_keys[df.index]])))
+
+        # Tag symbols at ingest so "news for X" is an index lookup
+        news_index.add(df)
 
-    df.to_csv(csv_path, index=False)
+    print(f"✅ Saved {len(df)} new news articles to top-level 'data' folder.")
+    return df
 
-    with open(txt_path, "w", encoding="utf-8") as f:
-        for _, row in df.iterrows():
-            f.write(f"{row['title']} ({row['source']})\n{row['url']}\n\n")
+def build_seen_index():
+    """
+    Seed the seen index from an existing news_feed.csv (done automatically on first use).
+    """
+    if not os.path.exists(CSV_PATH):
+        return 0
+    df = pd.read_csv(CSV_PATH)
+    keys = set(df["url"].astype(str).map(_hash)) | set(df["title"].map(lambda t: _hash(_title_key(t))))
+    with open(SEEN_INDEX_PATH, "w", encoding="utf-8") as f:
+        f.write("".join(f"{k}\n" for k in sorted(keys)))
+    return len(keys)
 
-    print(f"✅ Fetched and saved {len(df)} news articles to top-level 'data' folder.")
+def load_news(limit=None):
+    """
+    Stored articles, newest first.
+    """
+    if not os.path.exists(CSV_PATH):
+        return pd.DataFrame(columns=["title", "source", "url", "published"])
+    df = pd.read_csv(CSV_PATH).sort_values("published", ascending=False)
+    return df.head(limit) if limit else df
 
 if __name__ == "__main__":
     articles = fetch_news()
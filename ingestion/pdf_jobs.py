@@ -0,0 +1,157 @@
+# ingestion/pdf_jobs.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+SUMMARY_CACHE_DIR = os.path.join(DATA_DIR, "pdf_summaries")
+
+# Layout under SUMMARY_CACHE_DIR:
+#   <sha256>.pdf            the uploaded bytes
+#   <sha256>.json           job status/progress, and the summary once done
+#   chunks/<variant>/<sha>  summary of one page-aligned chunk, shared across documents
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_json(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _run_job(job_id, cache_dir, options):
+    """
+    Worker-process entry point: summarize <job_id>.pdf, reusing cached chunk summaries.
+
+    Chunks never cross a page boundary, so a later version of the same filing whose
+    pages are mostly unchanged produces mostly identical chunks, and only the edited
+    pages go through the model.
+    """
+    from ingestion.pdf_summarizer import iter_chunks, iter_pdf_pages, load_summarizer, summarize_chunks, truncate_summary
+
+    status_path = os.path.join(cache_dir, f"{job_id}.json")
+    status = _read_json(status_path) or {}
+    model, quantize = options.get("model", "bart"), options.get("quantize", False)
+    batch_size = options.get("batch_size", 8)
+    chunk_dir = os.path.join(cache_dir, "chunks", f"{model}{'-int8' if quantize else ''}")
+    os.makedirs(chunk_dir, exist_ok=True)
+
+    try:
+        tokenizer = load_summarizer(model, quantize).tokenizer
+        chunks, words = [], 0
+        for page in iter_pdf_pages(os.path.join(cache_dir, f"{job_id}.pdf")):
+            words += len(page.split())
+            chunks.extend(iter_chunks([page], tokenizer))
+
+        keys = [_sha256(chunk.encode("utf-8")) for chunk in chunks]
+        summaries = {}
+        for key in set(keys):
+            path = os.path.join(chunk_dir, key)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    summaries[key] = f.read()
+
+        pending = {key: chunk for key, chunk in zip(keys, chunks) if key not in summaries}
+        status.update(state="running", total=len(set(keys)), cached=len(summaries), done=len(summaries))
+        _write_json(status_path, status)
+
+        def progress(n_done):
+            status["done"] = len(summaries) + n_done
+            _write_json(status_path, status)
+
+        pending_keys = list(pending)
+        for key, summary in zip(pending_keys, summarize_chunks([pending[k] for k in pending_keys], model, quantize,
+                                                                batch_size, on_batch=progress)):
+            with open(os.path.join(chunk_dir, key), "w", encoding="utf-8") as f:
+                f.write(summary)
+            summaries[key] = summary
+
+        status.update(state="done", done=status["total"], finished=time.time(),
+                      summary=truncate_summary([summaries[k] for k in keys], words))
+    except Exception as e:
+        status.update(state="failed", error=str(e))
+    _write_json(status_path, status)
+    return status["state"]
+
+
+class PdfJobQueue:
+    """
+    Background PDF summarization backed by a process pool.
+
+    submit() stores the upload under the SHA-256 of its bytes and returns that hash as
+    the job id straight away; uploading the same bytes again returns the same job,
+    already finished if it was summarized before. A failed job stays failed until it is
+    submitted again with retry=True. status() reports per-chunk progress.
+    """
+
+    def __init__(self, max_workers=1, cache_dir=SUMMARY_CACHE_DIR, **options):
+        self.cache_dir = cache_dir
+        self.options = options
+        os.makedirs(cache_dir, exist_ok=True)
+        # Each worker holds its own copy of the summarization model, so keep the pool small
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _status_path(self, job_id):
+        return os.path.join(self.cache_dir, f"{job_id}.json")
+
+    def submit(self, pdf_bytes, filename=None, retry=False):
+        job_id = _sha256(pdf_bytes)
+        with self._lock:
+            status = _read_json(self._status_path(job_id))
+            if status and status.get("state") == "done":
+                return job_id
+            future = self._futures.get(job_id)
+            if future is not None and not future.done():
+                return job_id
+            if not retry and self.status(job_id)["state"] == "failed":
+                return job_id
+
+            pdf_path = os.path.join(self.cache_dir, f"{job_id}.pdf")
+            if not os.path.exists(pdf_path):
+                with open(pdf_path, "wb") as f:
+                    f.write(pdf_bytes)
+            _write_json(self._status_path(job_id), {
+                "job_id": job_id, "filename": filename, "state": "queued",
+                "submitted": time.time(), "done": 0, "total": None,
+            })
+            self._futures[job_id] = self._pool.submit(_run_job, job_id, self.cache_dir, self.options)
+        return job_id
+
+    def status(self, job_id):
+        """
+        Returns:
+            dict: state (queued/running/done/failed), done/total chunks, and 'summary' when done.
+        """
+        status = _read_json(self._status_path(job_id)) or {"job_id": job_id, "state": "unknown"}
+        future = self._futures.get(job_id)
+        if future is not None and future.done() and future.exception() is not None:
+            status.update(state="failed", error=str(future.exception()))
+        return status
+
+    def result(self, job_id, timeout=None):
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.status(job_id).get("summary")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
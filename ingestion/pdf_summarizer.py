@@ -1,48 +1,152 @@
 import fitz  # PyMuPDF
-from transformers import pipeline
 from fpdf import FPDF
 import math
 import os
+import re
+from core.instrumentation import span, timed
+from core.models import lazy_model
 
-# Load summarization pipeline
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Summarization models: the full BART model and a distilled variant that is ~2x faster on CPU
+SUMMARY_MODELS = {
+    "bart": "facebook/bart-large-cnn",
+    "distilbart": "sshleifer/distilbart-cnn-12-6",
+}
+DEFAULT_MODEL = "bart"
+
+# BART reads at most 1024 tokens; leave room for the special tokens
+MAX_CHUNK_TOKENS = 1000
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+@lazy_model("summarizer")
+def load_summarizer(model="bart", quantize=False):
+    """
+    Load the summarization pipeline on first use. 'quantize' applies int8 dynamic
+    quantization to the Linear layers (CPU only).
+    """
+    import torch
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+
+    model_name = SUMMARY_MODELS.get(model, model)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    seq2seq = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    seq2seq.eval()
+    if quantize and not torch.cuda.is_available():
+        seq2seq = torch.quantization.quantize_dynamic(seq2seq, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("summarization", model=seq2seq, tokenizer=tokenizer)
+
+def iter_pdf_pages(pdf_path):
+    """
+    Yield the text of each page in turn, so large PDFs are never held in memory as one string.
+    """
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield page.get_text()
 
 def extract_text_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text.strip()
-
-def chunk_text(text, max_chunk=1024):
-    sentences = text.split('. ')
-    chunks = []
-    current_chunk = ""
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) + 1 <= max_chunk:
-            current_chunk += sentence + ". "
-        else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + ". "
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    return chunks
-
-def summarize_pdf_content(text):
-    original_length = len(text.split())
-    target_length = max(80, math.ceil(original_length * 0.1))  # At least 80 words
-    chunks = chunk_text(text)
+    return "\n".join(iter_pdf_pages(pdf_path)).strip()
+
+def iter_chunks(pages, tokenizer, max_tokens=MAX_CHUNK_TOKENS):
+    """
+    Pack sentences from a stream of page texts into chunks of at most 'max_tokens'
+    tokenizer tokens. Sentences longer than the limit are split on token boundaries.
+    """
+    current, used = [], 0
+    for page in pages:
+        sentences = [s.strip() for s in _SENTENCE_END.split(page) if s.strip()]
+        if not sentences:
+            continue
+        token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+        for sentence, ids in zip(sentences, token_ids):
+            if len(ids) > max_tokens:
+                if current:
+                    yield " ".join(current)
+                    current, used = [], 0
+                for start in range(0, len(ids), max_tokens):
+                    yield tokenizer.decode(ids[start:start + max_tokens])
+                continue
+            if used + len(ids) > max_tokens:
+                yield " ".join(current)
+                current, used = [], 0
+            current.append(sentence)
+            used += len(ids)
+    if current:
+        yield " ".join(current)
+
+def chunk_text(text, max_chunk=MAX_CHUNK_TOKENS, model=DEFAULT_MODEL):
+    return list(iter_chunks([text], load_summarizer(model).tokenizer, max_chunk))
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def summarize_chunks(chunks, model=DEFAULT_MODEL, quantize=False, batch_size=8, on_batch=None):
+    """
+    Summarize an iterable of chunks, 'batch_size' per forward pass. 'on_batch' is called
+    with the number of chunks done so far after every batch.
+    """
+    summarizer = load_summarizer(model, quantize)
+    summaries = []
+    for batch in _batched(chunks, batch_size):
+        with span("model.inference", model=model):
+            outputs = summarizer(batch, max_length=200, min_length=30, do_sample=False,
+                                 truncation=True, batch_size=batch_size)
+        summaries.extend(o["summary_text"] for o in outputs)
+        if on_batch:
+            on_batch(len(summaries))
+    return summaries
 
-    summarized = []
-    for chunk in chunks:
-        summary = summarizer(chunk, max_length=200, min_length=30, do_sample=False)[0]['summary_text']
-        summarized.append(summary)
+def reduce_summaries(summaries, model=DEFAULT_MODEL, quantize=False, batch_size=8):
+    """
+    Map-reduce step: keep summarizing the summaries until they fit in a single chunk.
+    """
+    tokenizer = load_summarizer(model, quantize).tokenizer
+    while len(summaries) > 1:
+        # Each chunk of up to ~1000 tokens becomes a <=200-token summary, so every round shrinks the text
+        chunks = list(iter_chunks([" ".join(summaries)], tokenizer))
+        summaries = summarize_chunks(chunks, model, quantize, batch_size)
+    return summaries
+
+@timed
+def summarize_pages(pages, original_length=None, model=DEFAULT_MODEL, quantize=False,
+                    batch_size=8, map_reduce=False, on_batch=None):
+    """
+    Summarize a stream of page texts. Without 'map_reduce' the chunk summaries are
+    joined and truncated to ~10% of the original word count (at least 80 words);
+    with it they are recursively summarized into one final summary.
+    """
+    tokenizer = load_summarizer(model, quantize).tokenizer
+    word_count = [0]
+
+    def counted(stream):
+        for page in stream:
+            word_count[0] += len(page.split())
+            yield page
+
+    chunks = iter_chunks(counted(pages), tokenizer)
+    summarized = summarize_chunks(chunks, model, quantize, batch_size, on_batch)
+
+    if map_reduce:
+        summarized = reduce_summaries(summarized, model, quantize, batch_size)
+        return " ".join(summarized).strip()
+
+    return truncate_summary(summarized, original_length or word_count[0])
+
+def truncate_summary(summaries, original_length):
+    target_length = max(80, math.ceil(original_length * 0.1))  # At least 80 words
 
     # Join all chunks and truncate to ~10%
-    combined_summary = ' '.join(summarized)
-    summary_words = combined_summary.split()
-    final_summary = ' '.join(summary_words[:target_length])
-    return final_summary.strip()
+    summary_words = ' '.join(summaries).split()
+    return ' '.join(summary_words[:target_length]).strip()
+
+def summarize_pdf_content(text, **options):
+    return summarize_pages([text], original_length=len(text.split()), **options)
 
 def save_summary_to_pdf(summary_text, output_path):
     pdf = FPDF()
@@ -57,18 +161,19 @@ def save_summary_to_pdf(summary_text, output_path):
     pdf.output(output_path)
     print(f"✅ Summary saved to: {output_path}")
 
-def summarize_pdf(input_pdf_path, output_pdf_path):
+def summarize_pdf(input_pdf_path, output_pdf_path, **options):
     print(f"📄 Extracting from: {input_pdf_path}")
-    text = extract_text_from_pdf(input_pdf_path)
-    print(f"✂️ Summarizing ({len(text.split())} words)...")
-    summary = summarize_pdf_content(text)
+    # Pages are extracted, chunked and summarized as a stream
+    summary = summarize_pages(iter_pdf_pages(input_pdf_path), **options)
+    print(f"✂️ Summarized into {len(summary.split())} words")
     save_summary_to_pdf(summary, output_pdf_path)
+    return summary
 
 # Example usage
 if __name__ == "__main__":
     input_pdf = "input.pdf"  # Replace with your input file
     output_pdf = "summary_output.pdf"
-    
+
     if not os.path.exists(input_pdf):
         print("❌ Input PDF not found!")
     else:
@@ -0,0 +1,147 @@
+# ingestion/rate_limiter.py
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: 'rate' tokens are added per second, up to 'capacity'.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available. Returns the seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            # Sleep outside the lock so other threads can still refill/inspect
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """
+    Shared limiter for outbound HTTP calls.
+
+    Every host gets its own token bucket. When a host answers 429 it is put on a
+    cool-down (exponential backoff with full jitter, or the server's Retry-After),
+    and only requests to that host wait it out; other hosts keep flowing. Each
+    request is retried at most 'max_retries' times before it is dropped.
+    """
+
+    def __init__(self, rate=3.0, burst=5, max_retries=3, base_backoff=2.0, max_backoff=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._cooldown_until = {}
+        self._strikes = {}
+        self._stats = {"requests": 0, "throttled": 0, "retried": 0, "dropped": 0}
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _wait_for_host(self, host):
+        with self._lock:
+            delay = self._cooldown_until.get(host, 0.0) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _backoff(self, host, response):
+        """
+        Put 'host' on cool-down after a 429 and return the delay chosen.
+        """
+        with self._lock:
+            strikes = self._strikes.get(host, 0) + 1
+            self._strikes[host] = strikes
+
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            try:
+                # Honour the server's hint, but never let one header stall the host indefinitely
+                delay = min(max(float(retry_after), 0.0), self.max_backoff)
+            except (TypeError, ValueError):
+                ceiling = min(self.max_backoff, self.base_backoff * (2 ** (strikes - 1)))
+                delay = random.uniform(0, ceiling)
+
+            until = time.monotonic() + delay
+            self._cooldown_until[host] = max(self._cooldown_until.get(host, 0.0), until)
+            return delay
+
+    def _clear(self, host):
+        with self._lock:
+            self._strikes.pop(host, None)
+
+    def request(self, session, method, url, **kwargs):
+        """
+        Issue 'method url' through 'session' (a requests.Session or the requests module).
+
+        Returns the final response. If the host is still throttling after the retry
+        budget is spent, the last 429 response is returned and counted as dropped.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_host(host)
+            self._bucket(host).acquire()
+
+            response = session.request(method, url, **kwargs)
+            self._count("requests")
+            if response.status_code != 429:
+                self._clear(host)
+                return response
+
+            self._count("throttled")
+            delay = self._backoff(host, response)
+            if attempt == self.max_retries:
+                self._count("dropped")
+                print(f"[!] {host} still throttling after {self.max_retries} retries; dropping {url}")
+                return response
+
+            self._count("retried")
+            print(f"[!] Rate limit hit on {host}. Backing off {delay:.1f}s (retry {attempt + 1}/{self.max_retries})...")
+
+    def get(self, session, url, **kwargs):
+        return self.request(session, "GET", url, **kwargs)
+
+    def report(self):
+        """
+        Counters since start-up: requests sent, and how many were throttled, retried and dropped.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+# One limiter shared by every NSE call (real-time quotes and historical data)
+nse_limiter = RateLimiter()
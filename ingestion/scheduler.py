@@ -0,0 +1,327 @@
+# ingestion/scheduler.py
+#
+# Long-running ingestion daemon. Run from the project root:
+#
+#     python -m ingestion.scheduler --symbols TCS,INFY,RELIANCE
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from core.instrumentation import metrics as instrumentation
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+METRICS_PATH = os.path.join(DATA_DIR, "scheduler_metrics.json")
+# Prometheus textfile-collector export of the instrumentation timers/counters, written next to the JSON
+PROMETHEUS_FILENAME = "metrics.prom"
+
+# NSE cash market session
+MARKET_TZ = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+# Durations kept per task for the percentile metrics
+DURATION_WINDOW = 100
+
+
+def market_open(now=None):
+    """
+    True during the NSE session (Mon-Fri, 09:15-15:30 IST). Exchange holidays are not modelled.
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+class Task:
+    """
+    One node of the ingestion DAG.
+
+    A task is due when its 'interval' has elapsed since it last started, or when any
+    upstream task has finished successfully since then; a task with interval=None only
+    runs when triggered by its upstreams. Tasks marked 'market_hours' are held outside
+    the NSE session. An upstream trigger that arrives while the task is still running
+    is kept in 'pending_trigger' and fired as soon as that run finishes.
+    """
+
+    def __init__(self, name, fn, interval=None, after=(), market_hours=False):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.after = tuple(after)
+        self.market_hours = market_hours
+
+        self.running = False
+        self.pending_trigger = False
+        self.last_started = None
+        self.last_finished = None
+        self.last_ok = None
+        self.last_result = None
+        self.last_error = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.durations = deque(maxlen=DURATION_WINDOW)
+
+
+class IngestionScheduler:
+    """
+    Runs a DAG of ingestion tasks on one shared thread pool.
+
+    Independent tasks run concurrently; a task that is still running when it falls due
+    again is skipped (and counted) rather than started twice.
+    """
+
+    def __init__(self, max_workers=4, tick_seconds=1.0, metrics_path=METRICS_PATH, prometheus_path=None):
+        self.tasks = {}
+        self.tick_seconds = tick_seconds
+        self.metrics_path = metrics_path
+        self.prometheus_path = prometheus_path or (
+            os.path.join(os.path.dirname(metrics_path), PROMETHEUS_FILENAME) if metrics_path else None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        # Submitted runs waiting for a worker, and runs in progress
+        self._queued = 0
+        self._active = 0
+        self._stop = threading.Event()
+        self.started_at = None
+
+    def add(self, name, fn, interval=None, after=(), market_hours=False):
+        for upstream in after:
+            if upstream not in self.tasks:
+                raise ValueError(f"Task {name!r} depends on unknown task {upstream!r}")
+        if interval is None and not after:
+            raise ValueError(f"Task {name!r} needs an interval or an upstream task")
+        self.tasks[name] = Task(name, fn, interval, after, market_hours)
+        return self.tasks[name]
+
+    # ------------------- Scheduling ------------------- #
+    def _is_due(self, task, now):
+        if task.market_hours and not market_open():
+            return False
+        if task.last_started is None and not task.after:
+            return True
+        if task.interval is not None and (task.last_started is None or now - task.last_started >= task.interval):
+            return True
+        return self._triggered(task)
+
+    def _triggered(self, task):
+        upstream_done = [self.tasks[u].last_ok for u in task.after]
+        if task.after and all(t is not None for t in upstream_done):
+            # Wait for every upstream to have produced something, then run after the newest
+            return task.last_started is None or max(upstream_done) > task.last_started
+        return False
+
+    def _start(self, task, now):
+        # Called with self._lock held
+        task.running = True
+        task.last_started = now
+        self._submit(task)
+
+    def _submit(self, task):
+        # Called with self._lock held
+        self._queued += 1
+        self._executor.submit(self._run, task).add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            if future.cancelled():
+                self._queued -= 1
+            else:
+                self._active -= 1
+
+    def _run(self, task):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        started = time.monotonic()
+        error = True
+        try:
+            task.last_result = task.fn()
+            task.last_ok = time.monotonic()
+            task.last_error = None
+            error = False
+        except Exception as e:
+            task.failures += 1
+            task.last_error = f"{type(e).__name__}: {e}"
+            print(f"[!] Task {task.name} failed: {task.last_error}")
+        finally:
+            with self._lock:
+                task.durations.append(time.monotonic() - started)
+                task.last_finished = time.monotonic()
+                task.runs += 1
+                task.running = False
+                # Fire a trigger that arrived mid-run now; if it can't start yet,
+                # last_started was left alone so the next tick() still sees it
+                held = task.market_hours and not market_open()
+                upstream_busy = any(self.tasks[u].running for u in task.after)
+                if task.pending_trigger and not (held or upstream_busy or self._stop.is_set()):
+                    task.pending_trigger = False
+                    self._start(task, time.monotonic())
+            instrumentation.observe("scheduler.task", task.durations[-1], error=error, task=task.name)
+
+    def tick(self):
+        """
+        Start every task that is due now. Returns the names started.
+        """
+        now = time.monotonic()
+        started = []
+        with self._lock:
+            for task in self.tasks.values():
+                if not self._is_due(task, now):
+                    continue
+                if task.running:
+                    # Don't stack runs. An upstream trigger is remembered and fired when this
+                    # run finishes; a missed interval pushes the next attempt a full interval out
+                    if self._triggered(task):
+                        if not task.pending_trigger:
+                            task.pending_trigger = True
+                            task.skipped += 1
+                    else:
+                        task.skipped += 1
+                        task.last_started = now
+                    continue
+                if any(self.tasks[u].running for u in task.after):
+                    continue
+                task.pending_trigger = False
+                self._start(task, now)
+                started.append(task.name)
+        return started
+
+    def run_forever(self, metrics_every=30.0):
+        self.started_at = time.time()
+        last_metrics = 0.0
+        print(f"[✓] Ingestion scheduler started with tasks: {', '.join(self.tasks)}")
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                if time.monotonic() - last_metrics >= metrics_every:
+                    self.write_metrics()
+                    last_metrics = time.monotonic()
+                self._stop.wait(self.tick_seconds)
+        finally:
+            self.write_metrics()
+            self._executor.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+
+    # ------------------- Metrics ------------------- #
+    def metrics(self):
+        """
+        Returns:
+            dict: per-task runs/failures/skips, last/p50/max duration (s) and seconds since
+            the last success, plus the executor backlog (tasks submitted but not started).
+        """
+        now = time.monotonic()
+        tasks = {}
+        with self._lock:
+            for task in self.tasks.values():
+                durations = np.asarray(task.durations, dtype=float)
+                tasks[task.name] = {
+                    "running": task.running,
+                    "runs": task.runs,
+                    "failures": task.failures,
+                    "skipped": task.skipped,
+                    "last_duration": float(durations[-1]) if durations.size else None,
+                    "p50_duration": float(np.percentile(durations, 50)) if durations.size else None,
+                    "max_duration": float(durations.max()) if durations.size else None,
+                    "since_last_ok": None if task.last_ok is None else round(now - task.last_ok, 1),
+                    "last_error": task.last_error,
+                }
+        return {
+            "started_at": self.started_at,
+            "market_open": market_open(),
+            "backlog": self._queued,
+            "running": self._active,
+            "tasks": tasks,
+        }
+
+    def write_metrics(self):
+        if not self.metrics_path:
+            return
+        tmp_path = self.metrics_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**self.metrics(), "instrumentation": instrumentation.snapshot()}, f, indent=2)
+        os.replace(tmp_path, self.metrics_path)
+
+        if self.prometheus_path:
+            tmp_path = self.prometheus_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(instrumentation.to_prometheus())
+            os.replace(tmp_path, self.prometheus_path)
+
+
+def build_default_scheduler(symbols=None, max_workers=4, poll_interval=10, news_interval=15 * 60,
+                            fx_interval=15 * 60, history_interval=6 * 60 * 60):
+    """
+    The standard pipeline:
+
+        news -> sentiment -> news_index
+        fx
+        historical
+        realtime (market hours only)
+    """
+    from ingestion.entities import symbol_universe
+
+    def universe():
+        return symbols or sorted(symbol_universe())
+
+    def news():
+        from ingestion.news import fetch_news, save_news
+        return len(save_news(fetch_news()))
+
+    def sentiment():
+        from ingestion.sentiment import analyze_sentiment
+        return len(analyze_sentiment())
+
+    def news_index():
+        from rag.faiss_index import sync_news_index
+        return sync_news_index()
+
+    def fx():
+        from ingestion.fx import fetch_live_fx_rates
+        return len(fetch_live_fx_rates())
+
+    def historical():
+        from ingestion.historical import sync_universe
+        return len(sync_universe(universe()))
+
+    def realtime():
+        from ingestion.real_time import poll_once
+        return poll_once(universe())
+
+    scheduler = IngestionScheduler(max_workers=max_workers)
+    scheduler.add("news", news, interval=news_interval)
+    scheduler.add("sentiment", sentiment, after=["news"])
+    scheduler.add("news_index", news_index, after=["sentiment"])
+    scheduler.add("fx", fx, interval=fx_interval)
+    scheduler.add("historical", historical, interval=history_interval)
+    scheduler.add("realtime", realtime, interval=poll_interval, market_hours=True)
+    return scheduler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ingestion pipeline as a daemon.")
+    parser.add_argument("--symbols", default="", help="Comma-separated NSE symbols (default: every tracked symbol)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=10)
+    args = parser.parse_args()
+
+    from ingestion.real_time import setup_nse_session
+    setup_nse_session()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    scheduler = build_default_scheduler(symbols, max_workers=args.workers, poll_interval=args.poll_interval)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
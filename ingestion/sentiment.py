@@ -1,12 +1,12 @@
 # ingestion/sentiment.py
 
 import pandas as pd
+import numpy as np
+import hashlib
 import os
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
-
-# Download VADER lexicon (only needed once)
-nltk.download("vader_lexicon")
+from concurrent.futures import ProcessPoolExecutor
+from core.instrumentation import span, timed
+from core.models import lazy_model
 
 # Dynamically get path to data/ directory (one level up from current file)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -15,36 +15,175 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 INPUT_FILE = os.path.join(DATA_DIR, "news_feed.csv")
 OUTPUT_CSV = os.path.join(DATA_DIR, "news_sentiment.csv")
 OUTPUT_TXT = os.path.join(DATA_DIR, "news_sentiment_summary.txt")
+HOURLY_CSV = os.path.join(DATA_DIR, "sentiment_hourly.csv")
 
 # Ensure data folder exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
-def analyze_sentiment():
+# One set of thresholds for every model; scores are in [-1, 1]
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+LABELS = ["Negative", "Neutral", "Positive"]
+
+# Backfills larger than this are spread over a process pool
+PARALLEL_MIN_TEXTS = 5000
+
+# Headlines that mention no tracked symbol are aggregated under this pseudo-symbol
+MARKET_SYMBOL = "MARKET"
+
+@lazy_model("sentiment")
+def load_analyzer():
+    """
+    VADER analyzer, created on first use; the lexicon is downloaded only if it is missing.
+    """
+    import nltk
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+    except LookupError:
+        nltk.download("vader_lexicon", quiet=True)
+    return SentimentIntensityAnalyzer()
+
+@lazy_model("finbert")
+def load_finbert():
+    """
+    Optional FinBERT classifier (positive/negative/neutral) for financial headlines.
+    """
+    from transformers import pipeline
+    return pipeline("text-classification", model="ProsusAI/finbert", top_k=None)
+
+def url_hash(urls):
+    return [hashlib.sha1(str(u).encode("utf-8")).hexdigest() for u in urls]
+
+def _score_vader(texts):
+    sid = load_analyzer()
+    return np.fromiter((sid.polarity_scores(t)["compound"] for t in texts), dtype=np.float32, count=len(texts))
+
+def _score_textblob(texts):
+    from textblob import TextBlob
+    return np.fromiter((TextBlob(t).sentiment.polarity for t in texts), dtype=np.float32, count=len(texts))
+
+def _score_finbert(texts, batch_size=32):
+    outputs = load_finbert()(list(texts), batch_size=batch_size, truncation=True)
+    probs = [{d["label"].lower(): d["score"] for d in out} for out in outputs]
+    return np.array([p.get("positive", 0.0) - p.get("negative", 0.0) for p in probs], dtype=np.float32)
+
+SCORERS = {"vader": _score_vader, "textblob": _score_textblob, "finbert": _score_finbert}
+
+def _score_chunk(texts, model):
+    return SCORERS[model](texts)
+
+def score_texts(texts, model="vader", workers=None):
+    """
+    Score a batch of texts in [-1, 1]. Large VADER/TextBlob backfills are split across
+    a process pool; FinBERT is already batched on the model side.
+    """
+    texts = ["" if pd.isna(t) else str(t) for t in texts]
+    if not texts:
+        return np.empty(0, dtype=np.float32)
+    if model == "finbert" or len(texts) < PARALLEL_MIN_TEXTS:
+        with span("model.inference", model=model):
+            return SCORERS[model](texts)
+
+    workers = workers or os.cpu_count() or 2
+    chunks = [texts[i::workers] for i in range(workers)]
+    with span("model.inference", model=model), ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_score_chunk, chunks, [model] * workers))
+    # Undo the round-robin split
+    scores = np.empty(len(texts), dtype=np.float32)
+    for i, part in enumerate(parts):
+        scores[i::workers] = part
+    return scores
+
+def classify(scores):
+    """
+    Vectorized score -> label with the shared thresholds.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    codes = np.select([scores >= POSITIVE_THRESHOLD, scores <= NEGATIVE_THRESHOLD], [2, 0], default=1)
+    return pd.Categorical.from_codes(codes, categories=LABELS)
+
+def tag_symbols(titles):
+    """
+    Symbols mentioned in each title, by ticker or known company name.
+    """
+    from ingestion.entities import get_linker
+    return get_linker().tag(titles)
+
+def hourly_aggregates(df):
+    """
+    Per-symbol, per-hour sentiment: article count, mean score and label counts.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=["symbol", "hour", "articles", "mean_score", *LABELS])
+    exploded = df.assign(symbol=[s or [MARKET_SYMBOL] for s in tag_symbols(df["title"])]).explode("symbol")
+    exploded["hour"] = pd.to_datetime(exploded["published"], errors="coerce", utc=True).dt.floor("h")
+    grouped = exploded.groupby(["symbol", "hour"], observed=True)
+    agg = grouped.agg(articles=("score", "size"), mean_score=("score", "mean"))
+    counts = pd.crosstab([exploded["symbol"], exploded["hour"]], exploded["sentiment"]).reindex(columns=LABELS, fill_value=0)
+    out = agg.join(counts).reset_index()
+    return out.astype({"articles": "int32", "mean_score": "float32", **{label: "int32" for label in LABELS}})
+
+def load_sentiment(path=None):
+    """
+    Scored headlines as a typed frame.
+    """
+    path = path or OUTPUT_CSV
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["title", "source", "url", "published", "url_hash", "score", "sentiment"])
+    df = pd.read_csv(path)
+    if "score" not in df.columns:
+        df["score"] = np.nan
+    if "url_hash" not in df.columns:
+        df["url_hash"] = url_hash(df["url"])
+    df["score"] = df["score"].astype("float32")
+    df["sentiment"] = pd.Categorical(df["sentiment"], categories=LABELS)
+    return df
+
+def load_hourly(path=None):
+    path = path or HOURLY_CSV
+    if not os.path.exists(path):
+        return hourly_aggregates(pd.DataFrame())
+    df = pd.read_csv(path, parse_dates=["hour"])
+    return df.astype({"articles": "int32", "mean_score": "float32", **{label: "int32" for label in LABELS}})
+
+@timed
+def analyze_sentiment(model="vader"):
+    """
+    Score every headline in news_feed.csv that has not been scored yet (keyed by URL hash),
+    append the results, and refresh the per-symbol/per-hour aggregates.
+
+    Returns:
+        pd.DataFrame: all scored headlines.
+    """
     if not os.path.exists(INPUT_FILE):
         raise FileNotFoundError(f"{INPUT_FILE} not found. Run news.py first.")
 
-    df = pd.read_csv(INPUT_FILE)
-    sid = SentimentIntensityAnalyzer()
-    sentiments = []
+    news = pd.read_csv(INPUT_FILE)
+    news["url_hash"] = url_hash(news["url"])
 
-    for title in df["title"]:
-        score = sid.polarity_scores(title)["compound"]
-        if score >= 0.05:
-            sentiment = "Positive"
-        elif score <= -0.05:
-            sentiment = "Negative"
-        else:
-            sentiment = "Neutral"
-        sentiments.append(sentiment)
+    scored = load_sentiment()
+    scored = scored[scored["score"].notna()]
+    # Rows written before scores were stored get rescored once, and the summary rewritten
+    txt_mode = "a" if len(scored) else "w"
+    new = news[~news["url_hash"].isin(scored["url_hash"])].drop_duplicates("url_hash")
 
-    df["sentiment"] = sentiments
-    df.to_csv(OUTPUT_CSV, index=False)
+    if not new.empty:
+        new = new.assign(score=score_texts(new["title"].tolist(), model=model))
+        new["sentiment"] = classify(new["score"])
+        scored = pd.concat([scored, new[scored.columns]], ignore_index=True)
+        scored["sentiment"] = pd.Categorical(scored["sentiment"], categories=LABELS)
+        scored.to_csv(OUTPUT_CSV, index=False)
 
-    with open(OUTPUT_TXT, "w", encoding="utf-8") as f:
-        for _, row in df.iterrows():
-            f.write(f"[{row['sentiment']}] {row['title']} ({row['source']})\n")
+        lines = "[" + new["sentiment"].astype(str) + "] " + new["title"] + " (" + new["source"] + ")\n"
+        with open(OUTPUT_TXT, txt_mode, encoding="utf-8") as f:
+            f.write("".join(lines))
 
-    print(f"✅ Sentiment analysis complete: {len(df)} headlines analyzed.")
+    if not new.empty or not os.path.exists(HOURLY_CSV):
+        hourly_aggregates(scored).to_csv(HOURLY_CSV, index=False)
+    print(f"✅ Sentiment analysis complete: {len(new)} new headlines scored ({len(scored)} total).")
+    return scored
 
 if __name__ == "__main__":
     analyze_sentiment()
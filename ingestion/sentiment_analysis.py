@@ -1,19 +1,9 @@
-from textblob import TextBlob
+from ingestion.sentiment import classify, score_texts
 
 # Function to analyze sentiment
-def sentiment_analysis(text):
-    # Create a TextBlob object
-    blob = TextBlob(text)
-    
-    # Get the polarity of the text
-    polarity = blob.sentiment.polarity
-    
-    # Classify polarity into sentiment categories
-    if polarity > 0:
-        sentiment = "Positive"
-    elif polarity < 0:
-        sentiment = "Negative"
-    else:
-        sentiment = "Neutral"
-    
-    return sentiment
+def sentiment_analysis(text, model="textblob"):
+    # Score with the shared sentiment engine (TextBlob polarity by default)
+    score = score_texts([text], model=model)
+
+    # Classify polarity into sentiment categories using the engine's thresholds
+    return classify(score)[0]
@@ -0,0 +1,256 @@
+# ingestion/tick_store.py
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+TICK_DIR = os.path.join(DATA_DIR, "ticks")
+
+# One fixed-width record per quote. Timestamps are epoch nanoseconds (UTC);
+# a missing volume is stored as -1 and surfaced as <NA> by the reader.
+TICK_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("lastPrice", "<f8"),
+    ("change", "<f8"),
+    ("pChange", "<f8"),
+    ("dayHigh", "<f8"),
+    ("dayLow", "<f8"),
+    ("totalTradedVolume", "<i8"),
+])
+
+_FLOAT_FIELDS = ("lastPrice", "change", "pChange", "dayHigh", "dayLow")
+
+# The legacy CSV feed wrote naive datetime.now() strings on an IST machine.
+LEGACY_TZ = "Asia/Kolkata"
+
+
+def _to_ns(value, naive_tz="UTC"):
+    """
+    Accept epoch-ns ints, datetimes or timestamp strings and return epoch ns.
+    Naive values are interpreted in naive_tz.
+    """
+    if value is None:
+        return pd.Timestamp.now(tz="UTC").value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(naive_tz)
+    return ts.value
+
+
+def _last_timestamp(path):
+    """
+    Timestamp of the final record in a partition, or -1 if there is none.
+    """
+    if not os.path.exists(path):
+        return -1
+    size = os.path.getsize(path) // TICK_DTYPE.itemsize * TICK_DTYPE.itemsize
+    if size == 0:
+        return -1
+    with open(path, "rb") as f:
+        f.seek(size - TICK_DTYPE.itemsize)
+        return int(np.frombuffer(f.read(TICK_DTYPE.itemsize), dtype=TICK_DTYPE)["timestamp"][0])
+
+
+def _partition_date(ns):
+    return pd.Timestamp(ns, unit="ns", tz="UTC").strftime("%Y-%m-%d")
+
+
+class TickStore:
+    """
+    Append-only columnar tick store.
+
+    Ticks are partitioned as <root>/<YYYY-MM-DD>/<SYMBOL>.bin, each file a raw
+    NumPy record array of TICK_DTYPE. Appends are plain binary writes (no header
+    bookkeeping) and reads memory-map only the partitions a caller asks for,
+    binary-searching the time range inside each file.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or TICK_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self._names_path = os.path.join(self.root, "symbols.json")
+        self._names = None
+        self._lock = threading.Lock()
+
+    # ------------------- Write Path ------------------- #
+    def _company_names(self):
+        if self._names is None:
+            if os.path.exists(self._names_path):
+                with open(self._names_path, encoding="utf-8") as f:
+                    self._names = json.load(f)
+            else:
+                self._names = {}
+        return self._names
+
+    def partition_path(self, date, symbol):
+        return os.path.join(self.root, date, f"{symbol.upper()}.bin")
+
+    def append(self, quotes):
+        """
+        Append quote dicts (as returned by get_realtime_data) to the store.
+        Returns the number of ticks written.
+        """
+        groups = {}
+        names_changed = False
+
+        with self._lock:
+            names = self._company_names()
+            for quote in quotes:
+                symbol = quote["symbol"].upper()
+                ns = _to_ns(quote.get("timestamp"))
+                volume = quote.get("totalTradedVolume")
+                record = (ns,) + tuple(
+                    np.nan if quote.get(field) is None else float(quote[field]) for field in _FLOAT_FIELDS
+                ) + (-1 if volume is None or pd.isna(volume) else int(volume),)
+                groups.setdefault((_partition_date(ns), symbol), []).append(record)
+
+                company = quote.get("companyName")
+                if company and names.get(symbol) != company:
+                    names[symbol] = company
+                    names_changed = True
+
+            for (date, symbol), records in groups.items():
+                path = self.partition_path(date, symbol)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                batch = np.array(records, dtype=TICK_DTYPE)
+                batch = batch[np.argsort(batch["timestamp"], kind="stable")]
+                if _last_timestamp(path) > batch["timestamp"][0]:
+                    self._merge_partition(path, batch)
+                else:
+                    with open(path, "ab") as f:
+                        f.write(batch.tobytes())
+
+            if names_changed:
+                tmp_path = self._names_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(names, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self._names_path)
+
+        return sum(len(r) for r in groups.values())
+
+    @staticmethod
+    def _merge_partition(path, batch):
+        """
+        Rewrite a partition with out-of-order ticks merged in, keeping it
+        sorted so read_partition can binary-search it.
+        """
+        existing = np.fromfile(path, dtype=TICK_DTYPE)
+        merged = np.concatenate([existing, batch])
+        merged = merged[np.argsort(merged["timestamp"], kind="stable")]
+        tmp_path = path + ".tmp"
+        merged.tofile(tmp_path)
+        os.replace(tmp_path, path)
+
+    # ------------------- Read Path ------------------- #
+    def dates(self, start=None, end=None):
+        """
+        Partition dates on disk, optionally limited to [start, end].
+        """
+        dates = sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+        if start is not None:
+            first = pd.Timestamp(_to_ns(start), unit="ns", tz="UTC").strftime("%Y-%m-%d")
+            dates = [d for d in dates if d >= first]
+        if end is not None:
+            last = pd.Timestamp(_to_ns(end), unit="ns", tz="UTC").strftime("%Y-%m-%d")
+            dates = [d for d in dates if d <= last]
+        return dates
+
+    def symbols(self):
+        """
+        Every symbol with at least one partition, mapped to its company name (if known).
+        """
+        found = set()
+        for date in self.dates():
+            found.update(f[:-4] for f in os.listdir(os.path.join(self.root, date)) if f.endswith(".bin"))
+        names = self._company_names()
+        return {symbol: names.get(symbol) for symbol in sorted(found)}
+
+    def read_partition(self, date, symbol, start_ns=None, end_ns=None):
+        """
+        Memory-map one partition and slice it to [start_ns, end_ns].
+        """
+        path = self.partition_path(date, symbol)
+        if not os.path.exists(path) or os.path.getsize(path) < TICK_DTYPE.itemsize:
+            return np.empty(0, dtype=TICK_DTYPE)
+
+        records = np.memmap(path, dtype=TICK_DTYPE, mode="r",
+                            shape=(os.path.getsize(path) // TICK_DTYPE.itemsize,))
+        ts = records["timestamp"]
+        lo = 0 if start_ns is None else int(np.searchsorted(ts, start_ns, side="left"))
+        hi = len(ts) if end_ns is None else int(np.searchsorted(ts, end_ns, side="right"))
+        return np.array(records[lo:hi])
+
+    def read(self, symbols=None, start=None, end=None):
+        """
+        Load ticks for the requested symbols and time range as a typed DataFrame.
+
+        Args:
+            symbols (list[str]): Optional. Symbols to load; defaults to all.
+            start, end: Optional. Inclusive bounds (datetime, string or epoch ns).
+
+        Returns:
+            pd.DataFrame: One row per tick, sorted by symbol then timestamp.
+        """
+        start_ns = None if start is None else _to_ns(start)
+        end_ns = None if end is None else _to_ns(end)
+        wanted = None if symbols is None else {s.upper() for s in symbols}
+        names = self._company_names()
+
+        frames = []
+        for date in self.dates(start, end):
+            date_dir = os.path.join(self.root, date)
+            available = {f[:-4] for f in os.listdir(date_dir) if f.endswith(".bin")}
+            for symbol in sorted(available if wanted is None else available & wanted):
+                records = self.read_partition(date, symbol, start_ns, end_ns)
+                if len(records):
+                    frames.append((symbol, records))
+
+        return _records_to_frame(frames, names)
+
+
+def _records_to_frame(frames, names):
+    columns = ["symbol", "companyName", *TICK_DTYPE.names]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    records = np.concatenate([r for _, r in frames])
+    symbol_col = np.concatenate([np.full(len(r), s, dtype=object) for s, r in frames])
+    volume = pd.array(records["totalTradedVolume"], dtype="Int64")
+    volume[records["totalTradedVolume"] < 0] = pd.NA
+
+    df = pd.DataFrame({
+        "symbol": pd.Categorical(symbol_col),
+        "companyName": [names.get(s) for s in symbol_col],
+        "timestamp": pd.to_datetime(records["timestamp"], unit="ns", utc=True),
+        **{field: records[field] for field in _FLOAT_FIELDS},
+        "totalTradedVolume": volume,
+    })
+    return df[columns].sort_values(["symbol", "timestamp"], kind="stable").reset_index(drop=True)
+
+
+def import_csv(csv_path, store=None):
+    """
+    One-off migration of a legacy realtime_feed.csv into the tick store.
+    Naive legacy timestamps are IST wall-clock times, not UTC.
+    """
+    store = store or TickStore()
+    df = pd.read_csv(csv_path)
+    df["timestamp"] = [_to_ns(ts, naive_tz=LEGACY_TZ) for ts in df["timestamp"]]
+    df = df.sort_values("timestamp", kind="stable")
+    df = df.where(pd.notna(df), None)
+    written = store.append(df.to_dict("records"))
+    print(f"[✓] Imported {written} ticks from {csv_path} into {store.root}")
+    return written
+
+
+if __name__ == "__main__":
+    legacy = os.path.join(DATA_DIR, "realtime_feed.csv")
+    if os.path.exists(legacy):
+        import_csv(legacy)
@@ -0,0 +1,279 @@
+# rag/embeddings.py
+
+import contextlib
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from core.instrumentation import span, timed
+from core.models import lazy_model
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+EMBEDDING_CACHE_DIR = os.path.join(DATA_DIR, "embeddings")
+
+MODEL_NAME = "bert-base-uncased"
+
+
+def content_hash(text):
+    """
+    SHA-256 of the whitespace-normalized text; the key for both the docstore and the embedding cache.
+    """
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+@lazy_model("embeddings")
+def load_encoder(model_name=MODEL_NAME, quantize=False):
+    """
+    Load a tokenizer/model pair once per process. With 'quantize', the Linear layers
+    are converted to int8 dynamic quantization (CPU only).
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    vectors.f16  float16 rows of 'dim' values, appended and read through np.memmap
+    keys.jsonl   the content hash of each row, in row order
+    .lock        flock'd around every append, recovery and refresh
+
+    The app and the scheduler share one cache directory, so row numbers come from the
+    vectors file itself under the lock, and keys other processes appended are read in
+    before any new rows are assigned.
+    """
+
+    def __init__(self, cache_dir, dim):
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.vectors_path = os.path.join(cache_dir, "vectors.f16")
+        self.keys_path = os.path.join(cache_dir, "keys.jsonl")
+        self.lock_path = os.path.join(cache_dir, ".lock")
+        self.rows = {}
+        self._n_rows = 0
+        self._keys_offset = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._file_lock():
+            self._recover()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """
+        Exclusive lock across processes; callers also hold self._lock for threads.
+        """
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_keys(self):
+        """
+        Read complete key lines past the last offset seen. Returns (keys, end offset of each).
+        """
+        keys, ends = [], []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as f:
+                f.seek(self._keys_offset)
+                offset = self._keys_offset
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        keys.append(json.loads(line))
+                    except ValueError:
+                        break
+                    offset += len(line)
+                    ends.append(offset)
+        return keys, ends
+
+    def _stored_rows(self):
+        return os.path.getsize(self.vectors_path) // (2 * self.dim) if os.path.exists(self.vectors_path) else 0
+
+    def _recover(self):
+        """
+        Load the keys and cut both files back to the rows present in each, so an append
+        interrupted part-way (a torn last key line, or vectors whose keys were never
+        written) cannot shift later rows onto the wrong key. Runs under the file lock,
+        so it never cuts into another process's append in progress.
+        """
+        self._keys_offset = 0
+        self._vectors = None
+        keys, ends = self._read_keys()
+        keys = keys[:self._stored_rows()]
+        if os.path.exists(self.keys_path):
+            os.truncate(self.keys_path, ends[len(keys) - 1] if keys else 0)
+        if os.path.exists(self.vectors_path):
+            os.truncate(self.vectors_path, len(keys) * 2 * self.dim)
+        self.rows = {k: row for row, k in enumerate(keys)}
+        self._n_rows = len(keys)
+        self._keys_offset = ends[len(keys) - 1] if keys else 0
+
+    def _refresh(self):
+        """
+        Pick up rows other processes appended since the last read. Needs the file lock.
+        """
+        keys, ends = self._read_keys()
+        for k in keys:
+            self.rows.setdefault(k, self._n_rows)
+            self._n_rows += 1
+        if ends:
+            self._keys_offset = ends[-1]
+
+    def _keys_size(self):
+        return os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+
+    def _stale(self):
+        return self._keys_size() > self._keys_offset
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _mapped(self):
+        n_rows = self._n_rows
+        if self._vectors is None or self._vectors.shape[0] < n_rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(n_rows, self.dim)) if n_rows else None
+        return self._vectors
+
+    def get_many(self, keys):
+        """
+        Returns:
+            tuple: (found mask, float32 array with cached rows filled in and zeros elsewhere)
+        """
+        with self._lock:
+            if any(k not in self.rows for k in keys) and self._stale():
+                with self._file_lock():
+                    self._refresh()
+            out = np.zeros((len(keys), self.dim), dtype=np.float32)
+            rows = np.array([self.rows.get(k, -1) for k in keys], dtype=np.int64)
+            found = rows >= 0
+            if found.any():
+                out[found] = self._mapped()[rows[found]]
+            return found, out
+
+    def put_many(self, keys, vectors):
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._stored_rows() != self._n_rows or self._keys_size() != self._keys_offset:
+                # Another process died part-way through an append
+                self._recover()
+            fresh = {}
+            for k, v in zip(keys, vectors):
+                if k not in self.rows and k not in fresh:
+                    fresh[k] = v
+            if not fresh:
+                return
+            row = self._stored_rows()
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.asarray(list(fresh.values()), dtype=np.float16).tobytes())
+            lines = "".join(json.dumps(k) + "\n" for k in fresh)
+            with open(self.keys_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            for k in fresh:
+                self.rows[k] = row
+                row += 1
+            self._n_rows = row
+            self._keys_offset += len(lines.encode("utf-8"))
+
+
+class BatchedEncoder:
+    """
+    Mean-pooled transformer sentence encoder.
+
+    Inputs are deduplicated by content hash, looked up in the embedding cache, and
+    only the misses are run through the model: sorted by token length and batched
+    so each batch pads to its own longest member rather than the corpus maximum.
+    Pooling is masked, so a text's vector does not depend on its batch-mates.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=32, max_length=512, quantize=False,
+                 cache_dir=None, use_cache=True):
+        import torch
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # Dynamic int8 quantization is a CPU-only path
+        self.quantize = quantize and not torch.cuda.is_available()
+        self.tokenizer, self.model = load_encoder(model_name, self.quantize)
+        self.dim = self.model.config.hidden_size
+
+        self.cache = None
+        if use_cache:
+            variant = model_name.replace("/", "__") + ("-int8" if self.quantize else "") + f"-{max_length}"
+            self.cache = EmbeddingCache(os.path.join(cache_dir or EMBEDDING_CACHE_DIR, variant), self.dim)
+
+    def _encode_uncached(self, texts):
+        import torch
+
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]]
+        order = np.argsort(lengths, kind="stable")
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch_idx = order[start:start + self.batch_size]
+                inputs = self.tokenizer([texts[i] for i in batch_idx], return_tensors="pt",
+                                        padding=True, truncation=True, max_length=self.max_length)
+                with span("model.inference", model="embeddings"):
+                    hidden = self.model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                out[batch_idx] = pooled.float().cpu().numpy()
+        return out
+
+    @timed("rag.embeddings.encode")
+    def encode(self, texts):
+        """
+        Encode 'texts' into a float32 (len(texts), dim) array.
+        """
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        keys = [content_hash(t) for t in texts]
+        unique = dict(zip(keys, texts))
+        unique_keys = list(unique)
+
+        if self.cache is not None:
+            found, vectors = self.cache.get_many(unique_keys)
+        else:
+            found, vectors = np.zeros(len(unique_keys), dtype=bool), np.zeros((len(unique_keys), self.dim), dtype=np.float32)
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            encoded = self._encode_uncached([unique[unique_keys[i]] for i in missing])
+            if self.cache is not None:
+                # Hits come back float16-rounded; round misses the same so results don't depend on cache state
+                encoded = encoded.astype(np.float16).astype(np.float32)
+            vectors[missing] = encoded
+            if self.cache is not None:
+                self.cache.put_many([unique_keys[i] for i in missing], encoded)
+
+        position = {k: i for i, k in enumerate(unique_keys)}
+        return vectors[[position[k] for k in keys]]
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(model_name=MODEL_NAME, batch_size=32, max_length=512, quantize=False):
+    """
+    Shared BatchedEncoder per configuration.
+    """
+    return BatchedEncoder(model_name, batch_size=batch_size, max_length=max_length, quantize=quantize)
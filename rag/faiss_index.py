@@ -1,67 +1,372 @@
 import faiss
 import numpy as np
 import pandas as pd
-from transformers import AutoTokenizer, AutoModel
-import torch
+import json
+import os
+import threading
+from core.instrumentation import timed
+from rag.embeddings import content_hash, get_encoder
 
-# Initialize the transformer model and tokenizer for vector embedding
-tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-model = AutoModel.from_pretrained("bert-base-uncased")
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+INDEX_DIR = os.path.join(DATA_DIR, "faiss")
 
-def encode_text(texts):
+def encode_text(texts, batch_size=32, quantize=False):
     """
     Encode text using BERT model to get embeddings (vector representation).
+    Goes through the shared batched encoder, so repeated texts come from the embedding cache.
     """
-    # Tokenize the text
-    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    
-    # Get the embeddings from the model
-    with torch.no_grad():
-        outputs = model(**inputs)
-    embeddings = outputs.last_hidden_state.mean(dim=1).cpu().numpy()  # Mean pooling for sentence embeddings
-    
-    return embeddings
+    return get_encoder(batch_size=batch_size, quantize=quantize).encode(list(texts))
 
-def build_faiss_index(data):
+# Supported index layouts. Everything except flat_l2 runs inner product over
+# L2-normalized vectors, i.e. cosine similarity.
+INDEX_TYPES = ("flat_l2", "flat_ip", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_INDEX_TYPE = "flat_ip"
+
+# IVF centroids are retrained once the corpus has grown this much past the training set
+IVF_REBUILD_GROWTH = 4.0
+
+def uses_inner_product(index_type):
+    return index_type != "flat_l2"
+
+def default_nlist(n_vectors):
+    return int(min(65536, max(1, 4 * np.sqrt(n_vectors))))
+
+def train_threshold(index_type, nlist):
+    """
+    Minimum vectors needed to train 'index_type' (faiss wants ~39 points per centroid).
+    """
+    if index_type == "ivf_flat":
+        return 39 * nlist
+    if index_type == "ivf_pq":
+        return max(39 * nlist, 39 * 256)  # 8-bit PQ codebooks have 256 centroids each
+    return 0
+
+def make_index(index_type, dim, nlist=1, pq_m=16, hnsw_m=32):
+    """
+    Create an empty index of 'index_type' wrapped in an IndexIDMap so documents keep stable ids.
+    """
+    if index_type == "flat_l2":
+        base = faiss.IndexFlatL2(dim)
+    elif index_type == "flat_ip":
+        base = faiss.IndexFlatIP(dim)
+    elif index_type == "ivf_flat":
+        base = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "ivf_pq":
+        base = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = 200
+    else:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+    return faiss.IndexIDMap(base)
+
+def prepare_vectors(vectors, index_type):
+    vectors = np.ascontiguousarray(vectors, dtype="float32").copy()
+    if uses_inner_product(index_type) and len(vectors):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+def build_index(vectors, index_type=DEFAULT_INDEX_TYPE, ids=None, nlist=None, **params):
+    """
+    Train (if needed) and fill an index of 'index_type' from raw embeddings.
+    """
+    vectors = prepare_vectors(vectors, index_type)
+    nlist = nlist or default_nlist(len(vectors))
+    needed = train_threshold(index_type, nlist)
+    if len(vectors) < needed:
+        raise ValueError(f"{index_type} needs at least {needed} vectors to train, got {len(vectors)}")
+
+    index = make_index(index_type, vectors.shape[1], nlist=nlist, **params)
+    if not index.is_trained:
+        index.train(vectors)
+    ids = np.arange(len(vectors), dtype="int64") if ids is None else np.asarray(ids, dtype="int64")
+    index.add_with_ids(vectors, ids)
+    return index
+
+def set_search_params(index, nprobe=16, ef_search=64):
+    """
+    Apply query-time knobs: probes for IVF indexes, efSearch for HNSW.
+    """
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+    return index
+
+def query_vectors(queries, index):
+    """
+    Encode queries, normalizing them when 'index' scores by inner product.
+    """
+    vectors = encode_text(queries)
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        faiss.normalize_L2(vectors)
+    return vectors
+
+def build_faiss_index(data, index_type="flat_l2"):
     """
     Build a FAISS index from the provided data.
     The data should be a list of text documents (strings).
+    'index_type' is one of INDEX_TYPES; results are keyed by position in 'data'.
     """
     # Step 1: Encode the text data into vectors
     print("Encoding text data into vectors...")
     embeddings = encode_text(data)
-    
-    # Step 2: Initialize FAISS index (using L2 distance for similarity search)
-    dimension = embeddings.shape[1]  # This should match the embedding size (e.g., 768 for BERT)
-    index = faiss.IndexFlatL2(dimension)
-    
-    # Step 3: Add the encoded embeddings to the FAISS index
-    index.add(embeddings)
-    
-    return index
+
+    # Step 2/3: Initialize the FAISS index (training it if needed) and add the vectors
+    return build_index(embeddings, index_type=index_type)
 
 def search_faiss_index(query, index, top_k=5):
     """
     Search the FAISS index for the top-k most similar documents to the query.
     """
-    query_vector = encode_text([query])
-    
+    query_vector = query_vectors([query], index)
+
     # Perform the search
     _, indices = index.search(query_vector, top_k)
-    
+
     return indices
 
+class DocumentIndex:
+    """
+    FAISS index persisted under 'index_dir' together with an id -> document store.
+
+    index.faiss     the vectors, keyed by document id (IndexIDMap)
+    docstore.jsonl  one {"id", "hash", "source", "text"} record per line
+    index.json      requested/active index type and the corpus size it was trained on
+
+    Flat indexes are memory-mapped when loaded, so start-up does not re-embed anything.
+    add() embeds only documents whose content hash is not stored yet and appends them;
+    the docstore is only rewritten in full when load() found records to drop.
+
+    IVF types stage documents in a flat inner-product index until the corpus reaches
+    the training threshold, then rebuild; they rebuild again whenever the corpus has
+    grown IVF_REBUILD_GROWTH times past the set the centroids were trained on.
+    Rebuilds re-read vectors through the embedding cache, so they cost no model calls.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR, index_type=DEFAULT_INDEX_TYPE, nprobe=16, ef_search=64):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "index.faiss")
+        self.docstore_path = os.path.join(index_dir, "docstore.jsonl")
+        self.meta_path = os.path.join(index_dir, "index.json")
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.meta = {"index_type": index_type, "active_type": None, "trained_on": 0}
+        self.index = None
+        self._mutable = None
+        self.docs = {}
+        self.hashes = set()
+        self._compact = False
+        self._lock = threading.Lock()
+        # add() grows the published index in place; searches and that mutation take
+        # this lock, while embedding and disk writes stay outside it
+        self._search_lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.docstore_path):
+            with open(self.docstore_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn append from a crashed add; rewrite the store without it
+                        self._compact = True
+                        break
+                    self.docs[record["id"]] = record
+                    self.hashes.add(record["hash"])
+        if os.path.exists(self.index_path):
+            if os.path.exists(self.meta_path):
+                with open(self.meta_path, encoding="utf-8") as f:
+                    stored = json.load(f)
+                # The on-disk layout wins for reading; a different requested type triggers a rebuild on the next add
+                self.meta.update(active_type=stored["active_type"], trained_on=stored.get("trained_on", 0))
+            else:
+                # Indexes written before index.json existed are plain L2
+                self.meta["active_type"] = "flat_l2"
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.meta["active_type"].startswith("flat") else 0
+            self.index = set_search_params(faiss.read_index(self.index_path, flags), self.nprobe, self.ef_search)
+
+        # Ids are handed out sequentially and the docstore is saved before the index, so
+        # records past the index's size were stored by an add whose index write never
+        # landed: forget them and they are embedded again (from the cache) on the next add
+        indexed = self.index.ntotal if self.index is not None else 0
+        for doc_id in [i for i in self.docs if i >= indexed]:
+            self.hashes.discard(self.docs.pop(doc_id)["hash"])
+            self._compact = True
+        return self
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _staging_type(self):
+        requested = self.meta["index_type"]
+        return "flat_ip" if requested.startswith("ivf") else requested
+
+    def _writable_index(self, dimension):
+        if not os.path.exists(self.index_path):
+            self.meta["active_type"] = self._staging_type()
+            return make_index(self.meta["active_type"], dimension)
+        # The mmapped copy is read-only; the first add loads one in-memory copy that later adds reuse
+        return faiss.read_index(self.index_path)
+
+    def _needs_rebuild(self):
+        requested, active = self.meta["index_type"], self.meta["active_type"]
+        n = len(self.docs)
+        if requested.startswith("ivf"):
+            if active != requested:
+                return n >= train_threshold(requested, default_nlist(n))
+            return n >= IVF_REBUILD_GROWTH * max(1, self.meta["trained_on"])
+        return active != requested
+
+    def _rebuild(self):
+        ids = np.array(sorted(self.docs), dtype="int64")
+        vectors = encode_text([self.docs[i]["text"] for i in ids.tolist()])
+        print(f"[~] Rebuilding {self.meta['index_type']} index over {len(ids)} documents...")
+        self._mutable = build_index(vectors, self.meta["index_type"], ids=ids)
+        self.meta.update(active_type=self.meta["index_type"], trained_on=len(ids))
+
+    @staticmethod
+    def _replace_text(path, text):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _docstore_lines(records):
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def _save(self, index, new_records):
+        """
+        Persist docstore, then index, then metadata. The docstore only has 'new_records'
+        appended unless load() flagged it for compaction, in which case it is rewritten
+        atomically. A crash in between leaves at worst documents without vectors (or a
+        torn last line), which load() drops again.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        if self._compact:
+            self._replace_text(self.docstore_path,
+                               self._docstore_lines(self.docs[doc_id] for doc_id in sorted(self.docs)))
+            self._compact = False
+        else:
+            with open(self.docstore_path, "a", encoding="utf-8") as f:
+                f.write(self._docstore_lines(new_records))
+        tmp_path = self.index_path + ".tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+        self._replace_text(self.meta_path, json.dumps(self.meta))
+
+    @timed("rag.index.add")
+    def add(self, texts, source="news"):
+        """
+        Embed and index the texts that are not stored yet. Returns the number added.
+        """
+        with self._lock:
+            new_docs = {}
+            for text in texts:
+                text = text.strip() if isinstance(text, str) else ""
+                digest = content_hash(text) if text else None
+                if digest and digest not in self.hashes and digest not in new_docs:
+                    new_docs[digest] = text
+            if not new_docs:
+                return 0
+
+            embeddings = encode_text(list(new_docs.values()))
+            next_id = max(self.docs, default=-1) + 1
+            ids = np.arange(next_id, next_id + len(new_docs), dtype="int64")
+
+            if self._mutable is None:
+                self._mutable = self._writable_index(embeddings.shape[1])
+            vectors = prepare_vectors(embeddings, self.meta["active_type"])
+            records = [{"id": doc_id, "hash": digest, "source": source, "text": text}
+                       for doc_id, (digest, text) in zip(ids.tolist(), new_docs.items())]
+
+            with self._search_lock:
+                self._mutable.add_with_ids(vectors, ids)
+                for record in records:
+                    self.docs[record["id"]] = record
+                    self.hashes.add(record["hash"])
+
+            if self._needs_rebuild():
+                self._rebuild()
+            self._save(self._mutable, records)
+
+            with self._search_lock:
+                self.index = set_search_params(self._mutable, self.nprobe, self.ef_search)
+            print(f"[✓] Indexed {len(new_docs)} new documents ({len(self.docs)} total)")
+            return len(new_docs)
+
+    @timed("rag.index.search")
+    def search(self, query, top_k=5):
+        """
+        Return the top-k stored documents for 'query' as dicts with a 'score' field
+        (L2 distance for flat_l2, cosine similarity otherwise).
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        vectors = encode_text([query])
+        with self._search_lock:
+            # A rebuild may have swapped the metric since the check above
+            if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                faiss.normalize_L2(vectors)
+            scores, ids = self.index.search(vectors, top_k)
+        return [
+            {**self.docs[doc_id], "score": float(score)}
+            for score, doc_id in zip(scores[0], ids[0])
+            if doc_id in self.docs
+        ]
+
+def sync_news_index(index=None):
+    """
+    Add any headlines from data/news_feed.csv that are not indexed yet.
+    """
+    if index is None:
+        index = DocumentIndex()
+    news_path = os.path.join(DATA_DIR, "news_feed.csv")
+    if not os.path.exists(news_path):
+        return 0
+    news = pd.read_csv(news_path)
+    return index.add((news["title"].fillna("") + " (" + news["source"].fillna("") + ")").tolist(), source="news")
+
+def add_pdf_text(text, source, index=None, max_chars=1000):
+    """
+    Split extracted PDF text into paragraph-sized passages and add the new ones.
+    """
+    if index is None:
+        index = DocumentIndex()
+    passages, current = [], ""
+    for paragraph in text.split("\n\n"):
+        if current and len(current) + len(paragraph) > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}".strip()
+    if current:
+        passages.append(current)
+    return index.add(passages, source=source)
+
 # Example to test FAISS
 if __name__ == "__main__":
     # Sample data for testing
     data = ["The stock price of TCS rose by 5% today.", "Nifty index saw a decline in the past week.", "Sentiment for TCS is positive in the market."]
-    
+
     # Build FAISS index
     index = build_faiss_index(data)
-    
+
     # Query to search
     query = "TCS stock performance"
-    
+
     # Search FAISS index
     results = search_faiss_index(query, index)
     print("Top matches for the query:", results)
+
+    # Persistent index over the stored news feed
+    store = DocumentIndex()
+    sync_news_index(store)
+    print(store.search(query))
@@ -1,65 +1,108 @@
 import streamlit as st
-from rag.faiss_index import build_faiss_index, search_faiss_index
-from transformers import pipeline
-from ingestion.news import fetch_news
-from ingestion.sentiment import analyze_sentiment
-from ingestion.fx import fetch_fx_rates
-from ingestion.historical import fetch_historical_data
-from ingestion.real_time import fetch_real_time_data
-from ingestion.pdf_summarizer import summarize_pdf
-
-# Initialize the question-answering model (Hugging Face pipeline)
-qa_model = pipeline("question-answering")
-
-def get_relevant_data(query):
+import re
+from core.cache import TTLCache
+from core.instrumentation import count, span, timed
+from core.models import lazy_model
+from rag.retrieval import data_fingerprint, retrieve_context
+
+@lazy_model("qa")
+def load_qa_model():
     """
-    Retrieve relevant data from different modules based on the user's query.
-    This includes news, sentiment, FX rates, and stock data.
+    The question-answering model (Hugging Face pipeline), loaded on the first question.
     """
-    relevant_data = []
+    from transformers import pipeline
+    return pipeline("question-answering")
 
-    # Fetch data based on keywords in the query
-    if "deal" in query.lower() or "news" in query.lower():
-        news_data = fetch_news(query)
-        relevant_data.append(news_data)
+# QA windowing: tokens per model input, overlap between windows, and how many windows run per forward pass
+QA_MAX_SEQ_LEN = 384
+QA_DOC_STRIDE = 128
+QA_BATCH_SIZE = 8
+# Words of retrieved passages packed into one QA context before the model's own windowing
+QA_CONTEXT_WORDS = 220
 
-    if "sentiment" in query.lower():
-        sentiment_data = analyze_sentiment(query)
-        relevant_data.append(sentiment_data)
+# Answers keyed on (normalized query, data fingerprint): valid until the data changes or the TTL ends
+answer_cache = TTLCache(maxsize=512, ttl=15 * 60)
 
-    if "fx" in query.lower():
-        fx_data = fetch_fx_rates()
-        relevant_data.append(fx_data)
+def normalize_query(query):
+    return " ".join(re.sub(r"[^\w\s%&.-]", " ", query.lower()).split())
 
-    if "stock" in query.lower() or "historical" in query.lower():
-        stock_data = fetch_historical_data(query)
-        relevant_data.append(stock_data)
+def get_relevant_data(query, token_budget=2000):
+    """
+    Retrieve relevant data for the user's query.
+    The local vector index and stored news, sentiment, FX and stock data are consulted first;
+    live NSE/FX/RSS fetches run concurrently, with a timeout, only when the stored data is stale.
 
-    if "real-time" in query.lower() or "stock price" in query.lower():
-        real_time_data = fetch_real_time_data(query)
-        relevant_data.append(real_time_data)
+    Returns:
+        dict: {"context": str, "passages": list, "latency": {source: seconds}}
+    """
+    return retrieve_context(query, token_budget=token_budget)
 
-    if "pdf" in query.lower():
-        pdf_data = summarize_pdf(query)
-        relevant_data.append(pdf_data)
+def pack_passages(passages, max_words=QA_CONTEXT_WORDS):
+    """
+    Group ranked passages into contexts of roughly 'max_words' words each.
+    """
+    contexts, current, used = [], [], 0
+    for passage in passages:
+        words = len(passage["text"].split())
+        if current and used + words > max_words:
+            contexts.append("\n".join(current))
+            current, used = [], 0
+        current.append(passage["text"])
+        used += words
+    if current:
+        contexts.append("\n".join(current))
+    return contexts
+
+def answer_question(query, passages, max_seq_len=QA_MAX_SEQ_LEN, doc_stride=QA_DOC_STRIDE, batch_size=QA_BATCH_SIZE):
+    """
+    Run extractive QA over every packed context in batches and return the best span overall.
 
-    return relevant_data
+    Returns:
+        dict: {"answer", "score", "context"} or None when there is nothing to read.
+    """
+    contexts = pack_passages(passages)
+    if not contexts:
+        return None
+
+    qa = load_qa_model()
+    with span("model.inference", model="qa"):
+        results = qa(
+            question=[query] * len(contexts),
+            context=contexts,
+            max_seq_len=max_seq_len,
+            doc_stride=doc_stride,
+            batch_size=batch_size,
+            handle_impossible_answer=False,
+        )
+    if isinstance(results, dict):
+        results = [results]
+
+    best = max(range(len(results)), key=lambda i: results[i]["score"])
+    return {"answer": results[best]["answer"], "score": results[best]["score"], "context": contexts[best]}
 
 def generate_synthesis(query):
     """
     Synthesize the answer to the query using relevant data retrieved from various modules.
+    Repeated questions are served from the answer cache until the underlying data changes.
     """
-    # Retrieve relevant data
-    relevant_data = get_relevant_data(query)
-
-    # Combine the data into a single string to use as context for the model
-    context = ""
-    for data in relevant_data:
-        context += f"\n\n{data}"
-
-    # Use the question-answering model to generate a response based on the context
-    response = qa_model(question=query, context=context)
-    return response['answer']
+    key = (normalize_query(query), data_fingerprint())
+    cached = answer_cache.get(key)
+    count("qa.answer_cache", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+
+    # Retrieve relevant data, already ranked and trimmed to the token budget
+    retrieved = get_relevant_data(query)
+    best = answer_question(query, retrieved["passages"])
+    answer = best["answer"] if best else "No relevant data found for this question."
+
+    # Live fetches may have refreshed stored data, so key on the fingerprint as it is now
+    answer_cache.set((key[0], data_fingerprint()), answer)
+    return answer
+
+@timed
+def handle_query(query):
+    return generate_synthesis(query)
 
 def show_query_interface():
     """
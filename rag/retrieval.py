@@ -0,0 +1,289 @@
+# rag/retrieval.py
+
+import functools
+import glob
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from core.instrumentation import metrics, timed
+from ingestion.entities import get_linker, news_index, symbol_universe
+from ingestion.historical import DATA_DIR, load_historical
+from ingestion.tick_store import TickStore
+from rag.faiss_index import DocumentIndex
+
+# Approximate tokens per whitespace-separated word for budget accounting
+TOKENS_PER_WORD = 1.3
+
+# Cheap intent routing: a source is consulted only if one of its cue words appears
+INTENTS = {
+    "news": ("news", "deal", "deals", "headline", "announce", "acquisition", "merger", "earnings"),
+    "sentiment": ("sentiment", "mood", "positive", "negative", "bullish", "bearish"),
+    "fx": ("fx", "currency", "exchange rate", "usd", "eur", "jpy", "chf", "rupee", "inr"),
+    "historical": ("historical", "history", "trend", "past", "week", "month", "year", "close", "ohlc"),
+    "realtime": ("real-time", "realtime", "live", "now", "today", "current", "stock price", "price"),
+}
+
+# Cues match whole words only, so "now" doesn't fire on "know" nor "eur" on "europe"
+INTENT_PATTERNS = {
+    name: re.compile(r"\b(?:" + "|".join(re.escape(cue) for cue in cues) + r")\b")
+    for name, cues in INTENTS.items()
+}
+
+# Stored data older than this is topped up with a live fetch when the query needs it
+LIVE_STALENESS_SECONDS = {"news": 30 * 60, "fx": 60 * 60, "realtime": 60}
+
+
+@functools.lru_cache(maxsize=1)
+def default_index():
+    """
+    The persisted document index, loaded once per process.
+    """
+    return DocumentIndex()
+
+
+def detect_intents(query):
+    q = query.lower()
+    return {name for name, pattern in INTENT_PATTERNS.items() if pattern.search(q)}
+
+
+def known_symbols(store=None):
+    """
+    Symbols we hold any data for: stored histories plus the real-time tick store.
+    """
+    return set(symbol_universe(store))
+
+
+def detect_symbols(query, universe, store=None):
+    """
+    Symbols named in the query, by ticker (any case) or company name.
+    """
+    tokens = set(re.findall(r"[A-Za-z&\-]+", query.upper()))
+    return sorted((tokens & universe) | set(get_linker(store).find(query)))
+
+
+def _age_seconds(path):
+    return time.time() - os.path.getmtime(path) if os.path.exists(path) else float("inf")
+
+
+def _passage(source, text, score):
+    return {"source": source, "text": text, "score": score}
+
+
+# ------------------- Local Sources ------------------- #
+def _vector_passages(query, index, top_k):
+    return [
+        _passage(f"index:{hit['source']}", hit["text"], hit["score"])
+        for hit in index.search(query, top_k=top_k)
+    ]
+
+
+def _sentiment_passages(query, symbols):
+    path = os.path.join(DATA_DIR, "news_sentiment.csv")
+    if not os.path.exists(path):
+        return []
+    df = pd.read_csv(path)
+    if symbols:
+        ids = {i for s in symbols for i in news_index.lookup(s)}
+        df = df[df["url_hash"].isin(ids)] if "url_hash" in df.columns else df.iloc[0:0]
+    counts = df["sentiment"].value_counts().to_dict()
+    summary = ", ".join(f"{label}: {n}" for label, n in counts.items())
+    scope = " and ".join(symbols) if symbols else "all tracked news"
+    passages = [_passage("sentiment", f"Headline sentiment for {scope} — {summary}.", 0.9)]
+    for _, row in df.head(5).iterrows():
+        passages.append(_passage("sentiment", f"[{row['sentiment']}] {row['title']} ({row['source']})", 0.6))
+    return passages
+
+
+def _fx_passages():
+    from ingestion.fx import cross_rates, load_fx_history
+    history = load_fx_history()
+    if history.empty:
+        return []
+    legs = history.iloc[-1].dropna().to_dict()
+    pairs = {pair: value for pair, value in cross_rates(legs).items() if pair.endswith("/INR")}
+    rates = ", ".join(f"{pair} = {value:.4f}" for pair, value in pairs.items())
+    return [_passage("fx", f"FX rates as of {history.index[-1]:%Y-%m-%d %H:%M} UTC: {rates}.", 0.95)]
+
+
+def _historical_passages(symbols):
+    passages = []
+    for symbol in symbols:
+        df = load_historical(symbol)
+        if df.empty:
+            continue
+        last, first = df.iloc[-1], df.iloc[0]
+        change = (last["Close"] / first["Close"] - 1) * 100
+        passages.append(_passage(
+            "historical",
+            f"{symbol} closed at {last['Close']:.2f} on {df.index[-1].date()} "
+            f"(high {df['High'].max():.2f}, low {df['Low'].min():.2f}, {change:+.1f}% since {df.index[0].date()}).",
+            0.95,
+        ))
+    return passages
+
+
+def _quote_text(quote):
+    return (f"{quote['symbol']} last traded at ₹{quote['lastPrice']} ({quote['pChange']:+.2f}%), "
+            f"day range {quote['dayLow']}–{quote['dayHigh']}.")
+
+
+def _tick_passages(symbols, store):
+    ticks = store.read(symbols=symbols, start=pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=1))
+    if ticks.empty:
+        return [], set()
+    latest = ticks.groupby("symbol", observed=True).tail(1)
+    fresh = set()
+    passages = []
+    for _, tick in latest.iterrows():
+        age = (pd.Timestamp.now(tz="UTC") - tick["timestamp"]).total_seconds()
+        if age <= LIVE_STALENESS_SECONDS["realtime"]:
+            fresh.add(tick["symbol"])
+        passages.append(_passage("realtime", _quote_text(tick), 1.0))
+    return passages, fresh
+
+
+# ------------------- Live Sources ------------------- #
+def _live_quote(symbol):
+    from ingestion.real_time import get_realtime_data
+    quote = get_realtime_data(symbol)
+    return [_passage("realtime:live", _quote_text(quote), 1.0)] if quote else []
+
+
+def _live_fx():
+    from ingestion.fx import fetch_live_fx_rates
+    fetch_live_fx_rates()
+    return _fx_passages()
+
+
+def _live_news(query):
+    from ingestion.news import fetch_news, load_news, save_news
+    terms = {w for w in re.findall(r"\w+", query.lower()) if len(w) > 3}
+    # Unchanged feeds answer 304, so search the stored feed after appending whatever is new
+    save_news(fetch_news())
+    articles = load_news(limit=500).to_dict("records")
+    scored = [(sum(t in a["title"].lower() for t in terms), a) for a in articles]
+    scored = [(hits, a) for hits, a in scored if hits]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [_passage("news:live", f"{a['title']} ({a['source']}, {a['published']})", 0.5 + 0.1 * hits)
+            for hits, a in scored[:5]]
+
+
+def data_fingerprint(store=None):
+    """
+    Cheap digest of every stored source retrieval reads (path, size, mtime).
+    It changes whenever any of that data is rewritten or appended to.
+    """
+    store = store or TickStore()
+    paths = [os.path.join(DATA_DIR, name) for name in ("news_feed.csv", "news_sentiment.csv", os.path.join("fx", "inr_rates.bin"))]
+    paths += glob.glob(os.path.join(DATA_DIR, "faiss", "*"))
+    paths += glob.glob(os.path.join(DATA_DIR, "*_historical.npz"))
+    for date in store.dates()[-1:]:
+        paths += glob.glob(os.path.join(store.root, date, "*.bin"))
+
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        digest.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+# ------------------- Assembly ------------------- #
+def _estimate_tokens(text):
+    return int(len(text.split()) * TOKENS_PER_WORD) + 1
+
+
+def assemble_context(passages, token_budget):
+    """
+    Join passages best-first until the token budget is spent; duplicates are skipped.
+    """
+    chosen, used, seen = [], 0, set()
+    for passage in sorted(passages, key=lambda p: p["score"], reverse=True):
+        if passage["text"] in seen:
+            continue
+        cost = _estimate_tokens(passage["text"])
+        if used + cost > token_budget:
+            continue
+        chosen.append(passage)
+        seen.add(passage["text"])
+        used += cost
+    return "\n".join(p["text"] for p in chosen), chosen
+
+
+@timed
+def retrieve_context(query, token_budget=400, live_timeout=4.0, top_k=8, index=None, allow_live=True):
+    """
+    Gather context for 'query' from the vector index and stored data, then run only
+    the live fetches the query needs (stale or missing local data) concurrently,
+    each bounded by 'live_timeout' seconds.
+
+    Returns:
+        dict: {"context": str, "passages": list, "latency": {source: seconds}}
+    """
+    intents = detect_intents(query)
+    store = TickStore()
+    symbols = detect_symbols(query, known_symbols(store), store)
+    latency, passages = {}, []
+
+    def _timed_source(name, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception as e:
+            print(f"[!] Retrieval source {name} failed: {e}")
+            return []
+        finally:
+            latency[name] = time.perf_counter() - started
+            # Per-symbol live quotes share one series
+            metrics.observe("rag.retrieval.source", latency[name], source=":".join(name.split(":")[:2]))
+
+    # 1. Local, always cheap
+    if index is None:
+        index = default_index()
+    passages += _timed_source("index", _vector_passages, query, index, top_k)
+    if "sentiment" in intents:
+        passages += _timed_source("sentiment", _sentiment_passages, query, symbols)
+    if "fx" in intents:
+        passages += _timed_source("fx", _fx_passages)
+    if symbols and ("historical" in intents or not intents):
+        passages += _timed_source("historical", _historical_passages, symbols)
+
+    fresh_ticks = set()
+    if symbols and "realtime" in intents:
+        # A failed tick read comes back as [] from _timed_source(): no passages, nothing fresh
+        tick_passages, fresh_ticks = _timed_source("ticks", _tick_passages, symbols, store) or ([], set())
+        passages += tick_passages
+
+    # 2. Live, only for what local data could not answer
+    live = {}
+    if allow_live:
+        if "realtime" in intents:
+            for symbol in symbols:
+                if symbol not in fresh_ticks:
+                    live[f"live:quote:{symbol}"] = (_live_quote, symbol)
+        if "fx" in intents and _age_seconds(os.path.join(DATA_DIR, "fx", "inr_rates.bin")) > LIVE_STALENESS_SECONDS["fx"]:
+            live["live:fx"] = (_live_fx,)
+        if "news" in intents and _age_seconds(os.path.join(DATA_DIR, "news_feed.csv")) > LIVE_STALENESS_SECONDS["news"]:
+            live["live:news"] = (_live_news, query)
+
+    if live:
+        executor = ThreadPoolExecutor(max_workers=len(live), thread_name_prefix="rag-live")
+        futures = {executor.submit(_timed_source, name, fn, *args): name for name, (fn, *args) in live.items()}
+        done, not_done = wait(futures, timeout=live_timeout)
+        for future in done:
+            passages += future.result()
+        for future in not_done:
+            latency[futures[future]] = live_timeout
+            print(f"[!] Live source {futures[future]} timed out after {live_timeout}s")
+        # Don't hold the answer hostage to a slow feed
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    context, chosen = assemble_context(passages, token_budget)
+    return {"context": context, "passages": chosen, "latency": latency}